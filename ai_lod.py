@@ -0,0 +1,50 @@
+from settings import *
+
+class ThinkScheduler:
+    """Nivel de detalle de la IA: cada enemigo piensa con una frecuencia según su distancia.
+
+    Dentro de attack_range (+ AI_LOD_ATTACK_MARGIN) se piensa en todos los frames; más
+    lejos, cada N frames según AI_LOD_TIERS. Los enemigos se reparten en cubetas
+    round-robin para que los que piensan cada N frames no coincidan todos en el mismo.
+    El movimiento sigue integrándose cada frame con la última decisión.
+    """
+    def __init__(self, player, tiers=AI_LOD_TIERS, far_interval=AI_LOD_FAR_INTERVAL):
+        self.player = player
+        # (fracción de detection_range, intervalo en frames), de menor a mayor distancia
+        self.tiers = tiers
+        self.far_interval = far_interval
+        self.frame = 0
+        self.next_bucket = 0
+        self.thoughts = 0
+        self.skipped = 0
+
+    def begin_frame(self):
+        self.frame += 1
+
+    def interval(self, enemy):
+        """Cada cuántos frames piensa `enemy` según su distancia al jugador"""
+        dx = enemy.rect.centerx - self.player.rect.centerx
+        dy = enemy.rect.centery - self.player.rect.centery
+        distance_squared = dx * dx + dy * dy
+        near = enemy.attack_range + AI_LOD_ATTACK_MARGIN
+        if distance_squared <= near * near:
+            return 1
+        for fraction, interval in self.tiers:
+            limit = enemy.detection_range * fraction
+            if distance_squared <= limit * limit:
+                return interval
+        return self.far_interval
+
+    def should_think(self, enemy):
+        if enemy.think_bucket is None:
+            enemy.think_bucket = self.next_bucket
+            self.next_bucket += 1
+        interval = self.interval(enemy)
+        if interval == 1 or (self.frame + enemy.think_bucket) % interval == 0:
+            self.thoughts += 1
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        return {'frame': self.frame, 'thoughts': self.thoughts, 'skipped': self.skipped}
@@ -0,0 +1,157 @@
+from settings import *
+
+class Atlas:
+    """Página de textura: imágenes chicas empaquetadas por estantes en una sola superficie.
+
+    Cada imagen empaquetada se usa como una subsuperficie (una vista, sin copia), así los
+    frames de una misma animación quedan juntos en memoria.
+    """
+    def __init__(self, width=ATLAS_SIZE, height=ATLAS_SIZE, padding=ATLAS_PADDING):
+        self.surface = pygame.Surface((width, height), pygame.SRCALPHA).convert_alpha()
+        self.width, self.height = width, height
+        self.padding = padding
+        self.x = self.y = 0
+        self.shelf_height = 0
+        self.used_area = 0
+
+    def pack(self, surf):
+        """Copia `surf` al atlas y devuelve su subsuperficie, o None si ya no entra"""
+        width, height = surf.get_size()
+        if self.x + width > self.width:
+            # Estante lleno: abrir uno nuevo debajo
+            self.x = 0
+            self.y += self.shelf_height + self.padding
+            self.shelf_height = 0
+        if self.y + height > self.height or width > self.width:
+            return None
+
+        self.surface.blit(surf, (self.x, self.y))
+        view = self.surface.subsurface((self.x, self.y, width, height))
+        self.x += width + self.padding
+        self.shelf_height = max(self.shelf_height, height)
+        self.used_area += width * height
+        return view
+
+class AssetManager:
+    """Imágenes, máscaras y sonidos cargados una sola vez y compartidos entre reinicios.
+
+    Las imágenes chicas (hasta ATLAS_MAX_IMAGE px por lado) se empaquetan en páginas de
+    atlas; las demás quedan como superficies sueltas. Cada recurso pertenece a un grupo
+    ('player', 'enemies', 'objects', ...) para informar cuánta memoria ocupa cada uno.
+    """
+    def __init__(self):
+        self.images = {}    # clave -> superficie (subsuperficie del atlas o suelta)
+        self.frames = {}    # carpeta -> lista de superficies
+        self.masks = {}     # clave -> máscaras y otros recursos derivados
+        self.sounds = {}
+        self.groups = {}    # grupo -> claves de sus imágenes
+        self.packed = set() # claves que viven en un atlas
+        self.atlases = []
+        self.disk_loads = 0
+
+    def pack(self, key, surf, group='misc'):
+        """Registra una superficie ya cargada o recortada; la empaqueta si es chica"""
+        cached = self.images.get(key)
+        if cached is not None:
+            return cached
+
+        width, height = surf.get_size()
+        view = None
+        if width <= ATLAS_MAX_IMAGE and height <= ATLAS_MAX_IMAGE:
+            for atlas in self.atlases:
+                view = atlas.pack(surf)
+                if view:
+                    break
+            else:
+                self.atlases.append(Atlas())
+                view = self.atlases[-1].pack(surf)
+        if view:
+            self.packed.add(key)
+            surf = view
+
+        self.images[key] = surf
+        self.groups.setdefault(group, []).append(key)
+        return surf
+
+    def image(self, *path, group='misc'):
+        """Imagen de disco (solo la primera vez)"""
+        key = join(*path)
+        surf = self.images.get(key)
+        if surf is None:
+            self.disk_loads += 1
+            surf = self.pack(key, pygame.image.load(key).convert_alpha(), group)
+        return surf
+
+    def folder_frames(self, *path, group='misc'):
+        """Frames de una animación: los archivos N.png de una carpeta, en orden numérico"""
+        folder = join(*path)
+        frames = self.frames.get(folder)
+        if frames is None:
+            frames = []
+            for folder_path, _, file_names in walk(folder):
+                for file_name in sorted(file_names, key=lambda name: int(name.split('.')[0])):
+                    frames.append(self.image(folder_path, file_name, group=group))
+                break  # Solo la carpeta pedida, sin subcarpetas
+            self.frames[folder] = frames
+        return frames
+
+    def subfolders(self, *path):
+        key = ('subfolders', join(*path))
+        folders = self.frames.get(key)
+        if folders is None:
+            folders = sorted(next(walk(join(*path)))[1])
+            self.frames[key] = folders
+        return folders
+
+    def frame_masks(self, key, frames):
+        """Una máscara por frame, calculada una sola vez"""
+        masks = self.masks.get(key)
+        if masks is None:
+            masks = [pygame.mask.from_surface(frame) for frame in frames]
+            self.masks[key] = masks
+        return masks
+
+    def derived(self, key, build):
+        """Recurso calculado a partir de otros (p. ej. una silueta), construido una sola vez"""
+        value = self.masks.get(key)
+        if value is None:
+            value = build()
+            self.masks[key] = value
+        return value
+
+    def sound(self, *path):
+        key = join(*path)
+        sound = self.sounds.get(key)
+        if sound is None:
+            self.disk_loads += 1
+            sound = pygame.mixer.Sound(key)
+            self.sounds[key] = sound
+        return sound
+
+    def memory_report(self):
+        """KiB por grupo y ocupación de las páginas del atlas.
+
+        Las imágenes empaquetadas no tienen píxeles propios (son vistas de una página): en
+        su grupo solo se cuentan, y su memoria es la de las páginas del atlas.
+        """
+        report = {}
+        for group, keys in self.groups.items():
+            loose = [self.images[key] for key in keys if key not in self.packed]
+            report[group] = {
+                'images': len(keys),
+                'packed': len(keys) - len(loose),
+                'kib': round(sum(surf.get_width() * surf.get_height() * surf.get_bytesize() for surf in loose) / 1024, 1),
+            }
+        atlas_bytes = sum(atlas.width * atlas.height * atlas.surface.get_bytesize() for atlas in self.atlases)
+        used = sum(atlas.used_area for atlas in self.atlases)
+        total = sum(atlas.width * atlas.height for atlas in self.atlases)
+        report['atlas'] = {
+            'pages': len(self.atlases),
+            'kib': round(atlas_bytes / 1024, 1),
+            'fill': round(used / total, 3) if total else 0.0,
+        }
+        report['disk_loads'] = self.disk_loads
+        return report
+
+# Un único administrador para todo el proceso: sobrevive a restart_game
+assets = AssetManager()
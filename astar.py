@@ -1,101 +1,249 @@
 import heapq
+from array import array
+from math import sqrt
+from weakref import WeakKeyDictionary
+from navgrid import NavGrid
+
+SQRT2 = sqrt(2)
+
+# Movimientos (dx, dy, costo): 4 direcciones y diagonales
+ORTHOGONAL_MOVES = ((0, 1, 1), (1, 0, 1), (0, -1, 1), (-1, 0, 1))
+DIAGONAL_MOVES = ORTHOGONAL_MOVES + ((1, 1, SQRT2), (1, -1, SQRT2), (-1, 1, SQRT2), (-1, -1, SQRT2))
 
 def heuristic(a, b):
     # Distancia de Manhattan como heurística
     return abs(a[0] - b[0]) + abs(a[1] - b[1])
 
-def astar_pathfinding(start, goal, grid):
-    # Verificar que start y goal estén dentro de la grilla y sean transitables
-    rows, cols = len(grid), len(grid[0])
-    
-    # Verificar que las coordenadas estén dentro del rango
-    if not (0 <= start[0] < cols and 0 <= start[1] < rows):
-        print(f"Posición inicial {start} fuera de rango")
-        return []
-    if not (0 <= goal[0] < cols and 0 <= goal[1] < rows):
-        print(f"Posición objetivo {goal} fuera de rango")
-        return []
-    
-    # Verificar que las coordenadas sean transitables
-    if grid[start[1]][start[0]] == 1:
-        print(f"Posición inicial {start} no es transitable")
-        return []
-    if grid[goal[1]][goal[0]] == 1:
-        print(f"Posición objetivo {goal} no es transitable")
-        return []
-    
-    # Si start y goal son iguales, retornar una lista con ese único punto
-    if start == goal:
-        return [start]
-    
-    open_set = []
-    heapq.heappush(open_set, (0, start))
-    came_from = {}
-    g_score = {start: 0}
-    f_score = {start: heuristic(start, goal)}
-    
-    open_set_hash = {start}  # Para búsqueda O(1)
-    
-    # DEPURACIÓN: Mostrar información de inicio
-    print(f"A* iniciado desde {start} hacia {goal}")
-    
-    while open_set:
-        current_f, current = heapq.heappop(open_set)
-        open_set_hash.remove(current)
-        
-        if current == goal:
-            path = [current]
-            while current in came_from:
-                current = came_from[current]
-                path.append(current)
-            # DEPURACIÓN: Mostrar el camino encontrado
-            print(f"A* encontró camino: {path[::-1]}")
-            return path[::-1]  # Camino en orden correcto
-        
-        for neighbor in get_neighbors(current, grid):
-            tentative_g_score = g_score[current] + 1
-            
-            if tentative_g_score < g_score.get(neighbor, float('inf')):
-                came_from[neighbor] = current
-                g_score[neighbor] = tentative_g_score
-                f_score_value = tentative_g_score + heuristic(neighbor, goal)
-                f_score[neighbor] = f_score_value
-                
-                if neighbor not in open_set_hash:
-                    heapq.heappush(open_set, (f_score_value, neighbor))
-                    open_set_hash.add(neighbor)
-    
-    # Si no se encuentra camino al objetivo exacto, encontrar el punto más cercano
-    closest_point = None
-    min_distance = float('inf')
-    
-    for x in range(cols):
-        for y in range(rows):
-            if grid[y][x] == 0:  # Si es transitable
-                distance = heuristic((x, y), goal)
-                if distance < min_distance:
-                    min_distance = distance
-                    closest_point = (x, y)
-    
-    # DEPURACIÓN: No se encontró camino, intentando con punto cercano
-    if closest_point:
-        print(f"No hay camino directo. Intentando con punto cercano: {closest_point}")
-        if closest_point != start:
-            return astar_pathfinding(start, closest_point, grid)
-                
-    print("No se encontró ningún camino posible")
-    return []  # Si no se encuentra camino
+def octile(a, b):
+    # Distancia octil: heurística admisible con movimientos diagonales
+    dx, dy = abs(a[0] - b[0]), abs(a[1] - b[1])
+    return dx + dy + (SQRT2 - 2) * min(dx, dy)
+
+# Última grilla antigua convertida: (lista original, NavGrid). Mientras llegue la misma
+# lista se reutiliza la NavGrid (y con ella su motor A*). Cada llamada sigue recorriendo
+# la lista, O(celdas), por si cambió entre búsquedas; las celdas distintas se aplican con
+# set_walkable, que sube la versión (PathCache) y avisa a los oyentes (HPA*)
+_legacy_grid = [None, None]
+
+def as_navgrid(grid):
+    # Aceptar también la grilla antigua de listas anidadas
+    if isinstance(grid, NavGrid):
+        return grid
+    rows, navgrid = _legacy_grid
+    if rows is grid and navgrid.rows == len(grid) and navgrid.cols == len(grid[0]):
+        cells = navgrid.cells
+        fresh = bytes(1 if value else 0 for row in grid for value in row)
+        if fresh != cells:
+            cols = navgrid.cols
+            for index, value in enumerate(fresh):
+                if cells[index] != value:
+                    navgrid.set_walkable(index % cols, index // cols, not value)
+    else:
+        navgrid = NavGrid.from_rows(grid)
+        _legacy_grid[:] = (grid, navgrid)
+    return navgrid
+
+
+class AStar:
+    """Motor A* con búferes planos reutilizables entre búsquedas.
+
+    g-score, padre y estado cerrado viven en arrays del tamaño de la grilla; un
+    número de generación marca qué entradas son válidas, así que no se limpia nada
+    entre consultas. Una búsqueda puede avanzarse por partes con `step`, pero cada
+    motor solo mantiene una búsqueda activa a la vez.
+    """
+    def __init__(self, grid, diagonal=False, log=None):
+        self.grid = grid
+        self.diagonal = diagonal
+        self.log = log  # Callable opcional (por ejemplo print) para depuración
+        size = grid.cols * grid.rows
+        self.g_score = array('d', bytes(8 * size))
+        self.parent = array('i', bytes(4 * size))
+        self.seen = array('I', bytes(4 * size))
+        self.closed = array('I', bytes(4 * size))
+        self.generation = 0
+
+        # Estado de la búsqueda activa
+        self.open = []
+        self.result = []
+        self.expanded = 0
+
+    def _log(self, message):
+        if self.log:
+            self.log(message)
+
+    def _next_generation(self):
+        self.generation += 1
+        if self.generation >= 0xFFFFFFFF:
+            # Desbordamiento del sello: limpiar una vez y volver a empezar
+            size = len(self.seen)
+            self.seen = array('I', bytes(4 * size))
+            self.closed = array('I', bytes(4 * size))
+            self.generation = 1
+        return self.generation
+
+    def start_search(self, start, goal, bounds=None, diagonal=None):
+        """Prepara una búsqueda; `bounds` = (x0, y0, x1, y1) limita la región explorada"""
+        grid = self.grid
+        self.open = []
+        self.result = None
+        self.expanded = 0
+
+        # Verificar que las coordenadas estén dentro del rango y sean transitables
+        if not grid.in_bounds(*start):
+            self._log(f"Posición inicial {start} fuera de rango")
+            self.result = []
+            return
+        if not grid.in_bounds(*goal):
+            self._log(f"Posición objetivo {goal} fuera de rango")
+            self.result = []
+            return
+        if not grid.is_walkable(*start):
+            self._log(f"Posición inicial {start} no es transitable")
+            self.result = []
+            return
+        if not grid.is_walkable(*goal):
+            self._log(f"Posición objetivo {goal} no es transitable")
+            self.result = []
+            return
+
+        # Si start y goal son iguales, retornar una lista con ese único punto
+        if start == goal:
+            self.result = [start]
+            return
+
+        self._log(f"A* iniciado desde {start} hacia {goal}")
+        self.start = start
+        self.goal = goal
+        self.bounds = bounds or (0, 0, grid.cols, grid.rows)
+        self.moves = DIAGONAL_MOVES if (self.diagonal if diagonal is None else diagonal) else ORTHOGONAL_MOVES
+        self.estimate = octile if self.moves is DIAGONAL_MOVES else heuristic
+
+        generation = self._next_generation()
+        index = start[1] * grid.cols + start[0]
+        self.seen[index] = generation
+        self.g_score[index] = 0
+        self.parent[index] = -1
+        h = self.estimate(start, goal)
+        self.closest, self.closest_h = index, h
+        # (f, h, índice): en empate de f se expande primero el nodo más cercano a la meta
+        self.open = [(h, h, index)]
+
+    def step(self, max_expansions=None):
+        """Avanza la búsqueda; devuelve el camino al terminar o None si se agotó el presupuesto"""
+        if self.result is not None:
+            return self.result
+
+        cols = self.grid.cols
+        cells = self.grid.cells
+        g_score, parent, seen, closed = self.g_score, self.parent, self.seen, self.closed
+        generation = self.generation
+        goal_x, goal_y = self.goal
+        goal_index = goal_y * cols + goal_x
+        min_x, min_y, max_x, max_y = self.bounds
+        moves, estimate = self.moves, self.estimate
+        open_set = self.open
+        heappop, heappush = heapq.heappop, heapq.heappush
+        budget = max_expansions
+
+        while open_set:
+            if budget is not None:
+                if budget <= 0:
+                    return None
+                budget -= 1
+
+            _, _, current = heappop(open_set)
+            if closed[current] == generation:
+                continue  # Entrada obsoleta
+            closed[current] = generation
+            self.expanded += 1
+
+            if current == goal_index:
+                self.result = self.reconstruct(current)
+                self.open = []
+                self._log(f"A* encontró camino: {self.result}")
+                return self.result
+
+            x, y = current % cols, current // cols
+            current_g = g_score[current]
+            for dx, dy, cost in moves:
+                nx, ny = x + dx, y + dy
+                if not (min_x <= nx < max_x and min_y <= ny < max_y):
+                    continue
+                neighbor = ny * cols + nx
+                if cells[neighbor] or closed[neighbor] == generation:
+                    continue
+                # Sin cortar esquinas en diagonal
+                if dx and dy and (cells[y * cols + nx] or cells[ny * cols + x]):
+                    continue
+
+                tentative_g = current_g + cost
+                if seen[neighbor] != generation or tentative_g < g_score[neighbor]:
+                    seen[neighbor] = generation
+                    g_score[neighbor] = tentative_g
+                    parent[neighbor] = current
+                    h = estimate((nx, ny), (goal_x, goal_y))
+                    if h < self.closest_h:
+                        self.closest, self.closest_h = neighbor, h
+                    heappush(open_set, (tentative_g + h, h, neighbor))
+
+        # Sin camino: usar la celda alcanzada más cercana a la meta (misma búsqueda)
+        start_index = self.start[1] * cols + self.start[0]
+        if self.closest != start_index:
+            self.result = self.reconstruct(self.closest)
+            self._log(f"No hay camino directo. Usando punto cercano: {self.result[-1]}")
+        else:
+            self.result = []
+            self._log("No se encontró ningún camino posible")
+        return self.result
+
+    def reconstruct(self, index):
+        cols, parent = self.grid.cols, self.parent
+        path = []
+        while index != -1:
+            path.append((index % cols, index // cols))
+            index = parent[index]
+        return path[::-1]  # Camino en orden correcto
+
+    def find_path(self, start, goal, bounds=None, diagonal=None):
+        """Búsqueda completa en una sola llamada"""
+        self.start_search(start, goal, bounds, diagonal)
+        return self.step()
+
+
+# Un motor reutilizable por grilla para astar_pathfinding
+_engines = WeakKeyDictionary()
+
+def engine_for(grid):
+    engine = _engines.get(grid)
+    if engine is None:
+        engine = AStar(grid)
+        _engines[grid] = engine
+    return engine
+
+def astar_pathfinding(start, goal, grid, diagonal=False, log=None):
+    grid = as_navgrid(grid)
+    engine = engine_for(grid)
+    engine.log = log
+    return engine.find_path(tuple(start), tuple(goal), diagonal=diagonal)
 
 def get_neighbors(pos, grid):
     neighbors = []
     directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]  # 4 direcciones (sin diagonales)
-    
+
+    if isinstance(grid, NavGrid):
+        for dx, dy in directions:
+            x, y = pos[0] + dx, pos[1] + dy
+            if grid.is_walkable(x, y):
+                neighbors.append((x, y))
+        return neighbors
+
+    # Grilla antigua: se indexa directo, sin convertir toda la lista por cuatro celdas
     rows = len(grid)
     cols = len(grid[0])
-    
     for dx, dy in directions:
         x, y = pos[0] + dx, pos[1] + dy
         if 0 <= x < cols and 0 <= y < rows and grid[y][x] == 0:  # 0 = transitable
             neighbors.append((x, y))
-    
-    return neighbors
\ No newline at end of file
+
+    return neighbors
@@ -1,67 +1,228 @@
+"""Árbol de comportamiento por ticks.
+
+La definición del árbol es inmutable y se comparte entre todos los agentes; el estado
+de cada agente (qué hijo estaba corriendo, contadores de Repeater, datos propios) vive
+en su Blackboard. Cada tick devuelve SUCCESS, FAILURE o RUNNING, así las acciones
+largas se reparten entre ticks en lugar de bloquear el frame, y el siguiente tick se
+reanuda desde el nodo que quedó corriendo.
+
+Las funciones de Action/Condition reciben el agente; pueden devolver un Status o
+cualquier otro valor, que cuenta como SUCCESS si es verdadero y FAILURE si no.
+"""
+
+SUCCESS = 'success'
+FAILURE = 'failure'
+RUNNING = 'running'
+
+STATUSES = (SUCCESS, FAILURE, RUNNING)
+
+def to_status(result):
+    # Los estados se respetan; el resto vale por su verdad, como el `if child.run():`
+    # original (1, una lista no vacía o un numpy.bool_ son éxito)
+    if result.__class__ is str and result in STATUSES:
+        return result
+    return SUCCESS if result else FAILURE
+
+class Blackboard(dict):
+    """Estado por agente: datos libres más la memoria de los nodos en curso"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memory = {}
+
+    def clear(self):
+        super().clear()
+        self.memory.clear()
+
 class Node:
     """Nodo base del árbol de comportamiento."""
-    def run(self):
+    __slots__ = ()
+
+    def tick(self, agent, blackboard):
         raise NotImplementedError("Este método debe implementarse en nodos específicos.")
 
+    def run(self, agent=None, blackboard=None):
+        """Compatibilidad: un tick que devuelve True salvo FAILURE"""
+        return self.tick(agent, blackboard if blackboard is not None else Blackboard()) != FAILURE
+
 class Selector(Node):
     """Intenta ejecutar los hijos hasta que uno tenga éxito."""
+    __slots__ = ('children',)
+
     def __init__(self, children):
-        self.children = children
+        self.children = tuple(children)
 
-    def run(self):
-        for child in self.children:
-            if child.run():
-                return True
-        return False
+    def tick(self, agent, blackboard):
+        index = blackboard.memory.pop(self, 0)  # Reanudar desde el hijo que quedó corriendo
+        for index in range(index, len(self.children)):
+            status = self.children[index].tick(agent, blackboard)
+            if status == RUNNING:
+                blackboard.memory[self] = index
+                return RUNNING
+            if status == SUCCESS:
+                return SUCCESS
+        return FAILURE
 
 class Sequence(Node):
     """Ejecuta los hijos en orden hasta que uno falle."""
+    __slots__ = ('children',)
+
     def __init__(self, children):
-        self.children = children
+        self.children = tuple(children)
 
-    def run(self):
-        for child in self.children:
-            if not child.run():
-                return False
-        return True
+    def tick(self, agent, blackboard):
+        index = blackboard.memory.pop(self, 0)
+        for index in range(index, len(self.children)):
+            status = self.children[index].tick(agent, blackboard)
+            if status == RUNNING:
+                blackboard.memory[self] = index
+                return RUNNING
+            if status == FAILURE:
+                return FAILURE
+        return SUCCESS
 
 class Action(Node):
     """Ejecuta una acción específica."""
+    __slots__ = ('function',)
+
     def __init__(self, function):
         self.function = function
 
-    def run(self):
-        return self.function()
+    def tick(self, agent, blackboard):
+        # Sin agente se admite la forma antigua: una función sin argumentos
+        return to_status(self.function(agent) if agent is not None else self.function())
 
-class Condition(Node):
+class Condition(Action):
     """Evalúa una condición."""
-    def __init__(self, function):
-        self.function = function
-
-    def run(self):
-        return self.function()
+    __slots__ = ()
 
 class Inverter(Node):
     """Invierte el resultado del nodo hijo."""
+    __slots__ = ('child',)
+
     def __init__(self, child):
         self.child = child
 
-    def run(self):
-        return not self.child.run()
+    def tick(self, agent, blackboard):
+        status = self.child.tick(agent, blackboard)
+        if status == RUNNING:
+            return RUNNING
+        return FAILURE if status == SUCCESS else SUCCESS
 
 class Repeater(Node):
-    """Repite el nodo hijo un número específico de veces."""
+    """Repite el nodo hijo un número específico de veces (una ejecución por tick)."""
+    __slots__ = ('child', 'count')
+
     def __init__(self, child, count=None):
         self.child = child
         self.count = count
 
-    def run(self):
-        if self.count is None:
-            # Repetir infinitamente
-            while True:
-                self.child.run()
-        else:
-            # Repetir un número específico de veces
-            for _ in range(self.count):
-                self.child.run()
-        return True
\ No newline at end of file
+    def tick(self, agent, blackboard):
+        status = self.child.tick(agent, blackboard)
+        if status != RUNNING and self.count is not None:
+            done = blackboard.memory.get(self, 0) + 1
+            if done >= self.count:
+                blackboard.memory.pop(self, None)
+                return SUCCESS
+            blackboard.memory[self] = done
+        # Sin count se repite para siempre, pero sin bloquear: sigue en el próximo tick
+        return RUNNING
+
+
+# Forma compilada: el árbol aplanado en una tabla de saltos
+
+LEAF, REPEAT = 0, 1
+DONE_SUCCESS, DONE_FAILURE = -1, -2
+
+class CompiledTree:
+    """Árbol aplanado en instrucciones y evaluado en un bucle, sin recursión.
+
+    Cada hoja guarda a qué instrucción saltar si tiene éxito y a cuál si falla, así
+    Selector, Sequence e Inverter desaparecen al compilar. Un RUNNING guarda la hoja
+    en la memoria del agente y el siguiente tick continúa directamente desde ella, con
+    la misma semántica que los nodos interpretados.
+    """
+    def __init__(self, root):
+        self.kinds = []
+        self.functions = []
+        self.on_success = []
+        self.on_failure = []
+        self.counts = []
+        self.restart = []
+        self.entry = self.flatten(root, DONE_SUCCESS, DONE_FAILURE)
+        self.kinds = tuple(self.kinds)
+        self.functions = tuple(self.functions)
+        self.on_success = tuple(self.on_success)
+        self.on_failure = tuple(self.on_failure)
+        self.counts = tuple(self.counts)
+        self.restart = tuple(self.restart)
+
+    def emit(self, kind, function=None, success=DONE_SUCCESS, failure=DONE_FAILURE, count=None):
+        self.kinds.append(kind)
+        self.functions.append(function)
+        self.on_success.append(success)
+        self.on_failure.append(failure)
+        self.counts.append(count)
+        self.restart.append(None)
+        return len(self.kinds) - 1
+
+    def flatten(self, node, success, failure):
+        """Compila `node` con sus destinos de éxito y fallo; devuelve su instrucción de entrada"""
+        if isinstance(node, Action):
+            return self.emit(LEAF, node.function, success, failure)
+        if isinstance(node, Sequence):
+            entry = success
+            for child in reversed(node.children):
+                entry = self.flatten(child, entry, failure)
+            return entry
+        if isinstance(node, Selector):
+            entry = failure
+            for child in reversed(node.children):
+                entry = self.flatten(child, success, entry)
+            return entry
+        if isinstance(node, Inverter):
+            return self.flatten(node.child, failure, success)
+        if isinstance(node, Repeater):
+            # La instrucción REPEAT se alcanza cada vez que el hijo termina
+            repeat = self.emit(REPEAT, success=success, count=node.count)
+            self.restart[repeat] = self.flatten(node.child, repeat, repeat)
+            return self.restart[repeat]
+        raise TypeError(f"Nodo no soportado por el compilador: {type(node).__name__}")
+
+    def tick(self, agent, blackboard):
+        memory = blackboard.memory
+        pc = memory.pop(self, self.entry)  # Reanudar desde la hoja que quedó corriendo
+        kinds, functions, on_success, on_failure = self.kinds, self.functions, self.on_success, self.on_failure
+        while pc >= 0:
+            if kinds[pc] == LEAF:
+                status = to_status(functions[pc](agent))
+                if status == SUCCESS:
+                    pc = on_success[pc]
+                elif status == RUNNING:
+                    memory[self] = pc
+                    return RUNNING
+                else:
+                    pc = on_failure[pc]
+                continue
+
+            # REPEAT: el hijo terminó una vuelta
+            # El contador se guarda bajo (árbol, instrucción): varios árboles compilados
+            # pueden compartir la misma pizarra
+            count = self.counts[pc]
+            if count is not None:
+                key = (self, pc)
+                done = memory.get(key, 0) + 1
+                if done >= count:
+                    memory.pop(key, None)
+                    pc = on_success[pc]
+                    continue
+                memory[key] = done
+            memory[self] = self.restart[pc]
+            return RUNNING
+        return SUCCESS if pc == DONE_SUCCESS else FAILURE
+
+    def run(self, agent=None, blackboard=None):
+        return self.tick(agent, blackboard if blackboard is not None else Blackboard()) != FAILURE
+
+def compile_tree(root):
+    """Aplana un árbol de nodos en un CompiledTree"""
+    return CompiledTree(root)
@@ -0,0 +1,76 @@
+"""Costo de colisión por frame: recorrido completo de collision_sprites vs hash espacial.
+
+Replica el mapa de world.tmx en mosaicos de N x N y mueve E enemigos; se mide el
+tiempo de las dos consultas por eje que hace Enemy.check_collision en cada frame.
+
+Uso (desde la raíz del juego):  python bench/bench_collision.py
+También forma parte de bench/bench_suite.py.
+"""
+import os
+import sys
+from random import Random
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+from settings import *
+from pytmx import TiledMap
+from spatial import SpatialHash
+
+FRAMES = 60
+MAP_TILINGS = (1, 2, 4)
+ENEMY_COUNTS = (10, 100, 500)
+
+class Obstacle:
+    """Sustituto liviano de CollisionSprite (solo el rect)"""
+    __slots__ = ('rect',)
+
+    def __init__(self, rect):
+        self.rect = rect
+
+def load_obstacles(tiling):
+    """Rects del layer Objects repetidos en un mosaico de tiling x tiling mapas"""
+    tmx = TiledMap(join('data', 'maps', 'world.tmx'))
+    width, height = tmx.width * tmx.tilewidth, tmx.height * tmx.tileheight
+    base = [pygame.Rect(obj.x, obj.y, obj.width, obj.height) for obj in tmx.get_layer_by_name('Objects')]
+    obstacles = [Obstacle(rect.move(tx * width, ty * height)) for tx in range(tiling) for ty in range(tiling) for rect in base]
+    return obstacles, (width * tiling, height * tiling)
+
+def brute_force(obstacles, rect):
+    return [obstacle for obstacle in obstacles if obstacle.rect.colliderect(rect)]
+
+def hashed(spatial_hash, rect):
+    return [obstacle for obstacle in spatial_hash.query(rect) if obstacle.rect.colliderect(rect)]
+
+def run(tiling, enemy_count):
+    obstacles, (width, height) = load_obstacles(tiling)
+    spatial_hash = SpatialHash()
+    for obstacle in obstacles:
+        spatial_hash.insert(obstacle, obstacle.rect)
+
+    rng = Random(tiling * 1000 + enemy_count)
+    enemies = [pygame.Rect(rng.uniform(0, width), rng.uniform(0, height), 60, 60) for _ in range(enemy_count)]
+
+    results = {}  # nombre -> ms de cada frame
+    for name, query in (('brute', lambda rect: brute_force(obstacles, rect)),
+                        ('hash', lambda rect: hashed(spatial_hash, rect))):
+        samples = []
+        for frame in range(FRAMES):
+            start = perf_counter()
+            for enemy in enemies:
+                enemy.x += 3 if frame % 2 else -3
+                query(enemy)  # Eje horizontal
+                enemy.y += 3 if frame % 2 else -3
+                query(enemy)  # Eje vertical
+            samples.append((perf_counter() - start) * 1000)
+        results[name] = samples
+    return len(obstacles), results
+
+if __name__ == '__main__':
+    print(f"{'mapa':>6} {'obstáculos':>11} {'enemigos':>9} {'recorrido ms':>13} {'hash ms':>9}")
+    for tiling in MAP_TILINGS:
+        for enemy_count in ENEMY_COUNTS:
+            obstacle_count, results = run(tiling, enemy_count)
+            brute, hash_ms = (sum(results[name]) / FRAMES for name in ('brute', 'hash'))
+            print(f"{tiling}x{tiling:<4} {obstacle_count:>11} {enemy_count:>9} {brute:>13.3f} {hash_ms:>9.3f}")
@@ -0,0 +1,291 @@
+"""Suite de benchmarks de los caminos calientes del juego, sin ventana (driver dummy de SDL).
+
+Carga world.tmx a través de Game y mide:
+  spawn      crear K enemigos (un frame = K llamadas a create_enemy)
+  step       un paso fijo de simulación con K enemigos vivos
+  astar      astar_pathfinding entre pares aleatorios de celdas transitables (un frame = un camino)
+  draw       AllSprites.draw con N enemigos dentro de la cámara
+  bullets    bullet_collision con B balas x E enemigos
+  rotate_gun Gun.rotate_gun barriendo ángulos
+  behavior   un tick de ENEMY_BEHAVIOR para K enemigos, en forma de nodos y compilada
+  collision  consultas de colisión del mapa (bench_collision.py, recorrido vs hash)
+
+Para cada escenario se informa fps (frames por segundo), tiempos p50/p95/p99 por frame,
+el pico de memoria asignada durante los frames (tracemalloc, en una segunda pasada
+para no ensuciar los tiempos). El pico de RSS es de todo el proceso y depende del orden
+de los escenarios, así que se informa una sola vez en `meta`. El JSON sale con claves
+ordenadas para poder compararlo entre corridas.
+
+Uso (desde la raíz del juego):
+  python bench/bench_suite.py --output bench.json
+  python bench/bench_suite.py --baseline bench.json   # compara y marca regresiones
+"""
+import os
+import sys
+import io
+import json
+import platform
+import resource
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import redirect_stdout
+from random import Random
+from time import perf_counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from settings import *
+from main import Game
+from astar import astar_pathfinding
+from behavior_tree import compile_tree
+from sprites import ENEMY_BEHAVIOR
+import bench_collision
+
+SEED = 1234
+REGRESSION_THRESHOLD = 0.10  # +10 % en p50/p95 cuenta como regresión
+
+SPAWN_COUNTS = (10, 100, 500)
+STEP_COUNTS = (100, 500)
+DRAW_COUNTS = (50, 200, 1000)
+BULLET_CASES = ((10, 10), (50, 100), (100, 500))
+ASTAR_PAIRS = 200
+ROTATE_FRAMES = 5000
+BEHAVIOR_COUNT = 200
+
+def percentile(samples, q):
+    """Percentil por rango más cercano de una lista ya ordenada"""
+    return samples[min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))]
+
+def summarize(samples, peak_bytes=None):
+    samples = sorted(samples)
+    mean = sum(samples) / len(samples)
+    result = {
+        'frames': len(samples),
+        'fps': round(1000 / mean, 1) if mean else None,
+        'mean_ms': round(mean, 4),
+        'p50_ms': round(percentile(samples, 50), 4),
+        'p95_ms': round(percentile(samples, 95), 4),
+        'p99_ms': round(percentile(samples, 99), 4),
+    }
+    if peak_bytes is not None:
+        result['peak_alloc_kib'] = round(peak_bytes / 1024, 1)
+    return result
+
+def measure(frames, run, prepare=None):
+    """Tiempo de cada frame de `run(frame)`; `prepare(frame)` corre antes, fuera de la medición"""
+    samples = []
+    for frame in range(frames):
+        if prepare:
+            prepare(frame)
+        start = perf_counter()
+        run(frame)
+        samples.append((perf_counter() - start) * 1000)
+
+    # Segunda pasada con tracemalloc activo solo para el pico de memoria
+    tracemalloc.start()
+    for frame in range(frames):
+        if prepare:
+            prepare(frame)
+        tracemalloc.reset_peak()
+        run(frame)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return summarize(samples, peak)
+
+
+class Suite:
+    """Escenarios sobre una única partida sin ventana (el mapa se carga una sola vez)"""
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.rng = Random(SEED)
+        with redirect_stdout(io.StringIO()):
+            self.game = Game(headless=True, seed=SEED)
+        # Que el jugador no muera ni se gane la partida en medio de un escenario
+        self.game.enemies_to_win = float('inf')
+        self.view = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+
+    def frames(self, count):
+        return max(5, int(count * self.scale))
+
+    def clear(self):
+        """Devuelve enemigos y balas a sus pools y restaura al jugador"""
+        game = self.game
+        for sprite in list(game.enemy_sprites) + list(game.bullet_sprites):
+            sprite.kill()
+        player = game.player
+        player.health, player.is_alive, player.is_invulnerable = player.max_health, True, False
+        game.enemies_killed = 0
+
+    def scatter(self, count, rect):
+        """Enemigos en posiciones aleatorias dentro de `rect` (coordenadas del mundo)"""
+        game = self.game
+        for _ in range(count):
+            game.create_enemy()
+        for enemy in game.enemy_sprites:
+            enemy.rect.center = (self.rng.randint(rect.left, rect.right), self.rng.randint(rect.top, rect.bottom))
+            enemy.hitbox_rect.center = enemy.rect.center
+        game.enemy_grid.rebuild(game.enemy_sprites)
+
+    def camera_rect(self):
+        self.view.center = self.game.player.rect.center
+        return self.view
+
+    def spawn(self, count):
+        def prepare(frame):
+            self.clear()
+        def run(frame):
+            for _ in range(count):
+                self.game.create_enemy()
+        return measure(self.frames(20), run, prepare)
+
+    def step(self, count):
+        self.clear()
+        for _ in range(count):
+            self.game.create_enemy()
+        def prepare(frame):
+            self.game.player.health, self.game.player.is_alive = self.game.player.max_health, True
+        return measure(self.frames(120), lambda frame: self.game.step(1 / SIM_RATE), prepare)
+
+    def astar(self, pairs):
+        grid = self.game.grid
+        walkable = [(x, y) for y in range(grid.rows) for x in range(grid.cols) if grid.is_walkable(x, y)]
+        queries = [(self.rng.choice(walkable), self.rng.choice(walkable)) for _ in range(self.frames(pairs))]
+        return measure(len(queries), lambda frame: astar_pathfinding(*queries[frame], grid))
+
+    def draw(self, count):
+        self.clear()
+        self.scatter(count, self.camera_rect())
+        target = self.game.player.rect.center
+        return measure(self.frames(120), lambda frame: self.game.all_sprites.draw(target))
+
+    def bullets(self, bullet_count, enemy_count):
+        game = self.game
+        self.clear()
+        area = self.camera_rect().copy()
+        self.scatter(enemy_count, area)
+        directions = [pygame.Vector2(1, 0).rotate(self.rng.uniform(0, 360)) for _ in range(bullet_count)]
+        positions = [(self.rng.randint(area.left, area.right), self.rng.randint(area.top, area.bottom)) for _ in range(bullet_count)]
+
+        def prepare(frame):
+            # Mismo estado en cada frame: balas nuevas y enemigos vivos otra vez
+            for bullet in list(game.bullet_sprites):
+                bullet.kill()
+            for position, direction in zip(positions, directions):
+                game.bullet_pool.acquire(game.bullet_surf, position, direction, (game.all_sprites, game.bullet_sprites), game.bullet_mask)
+            for enemy in game.enemy_sprites:
+                enemy.death_time = 0
+            game.enemies_killed = 0
+        return measure(self.frames(60), lambda frame: game.bullet_collision(), prepare)
+
+    def rotate_gun(self, frames):
+        gun = self.game.gun
+        directions = [pygame.Vector2(1, 0).rotate(angle * 0.37) for angle in range(self.frames(frames))]
+        def run(frame):
+            gun.player_direction = directions[frame]
+            gun.rotate_gun()
+        return measure(len(directions), run)
+
+    def behavior(self, count, compiled):
+        """Ticks del árbol de los enemigos sin el resto del update (movimiento, animación)"""
+        game = self.game
+        self.clear()
+        self.scatter(count, self.camera_rect().inflate(WINDOW_WIDTH, WINDOW_HEIGHT))
+        tree = compile_tree(ENEMY_BEHAVIOR) if compiled else ENEMY_BEHAVIOR
+        enemies = list(game.enemy_sprites)
+        def prepare(frame):
+            game.player.health, game.player.is_alive = game.player.max_health, True
+        def run(frame):
+            for enemy in enemies:
+                tree.tick(enemy, enemy.blackboard)
+        return measure(self.frames(120), run, prepare)
+
+    def collision(self):
+        results = {}
+        for tiling in bench_collision.MAP_TILINGS:
+            for enemy_count in bench_collision.ENEMY_COUNTS:
+                obstacle_count, samples = bench_collision.run(tiling, enemy_count)
+                for name, times in samples.items():
+                    results[f'collision[{name},map={tiling}x{tiling},enemies={enemy_count}]'] = summarize(times)
+        return results
+
+    def run(self, only=None):
+        scenarios = {}
+        for count in SPAWN_COUNTS:
+            scenarios[f'spawn[k={count}]'] = lambda count=count: self.spawn(count)
+        for count in STEP_COUNTS:
+            scenarios[f'step[k={count}]'] = lambda count=count: self.step(count)
+        scenarios[f'astar[pairs={ASTAR_PAIRS}]'] = lambda: self.astar(ASTAR_PAIRS)
+        for count in DRAW_COUNTS:
+            scenarios[f'draw[n={count}]'] = lambda count=count: self.draw(count)
+        for bullet_count, enemy_count in BULLET_CASES:
+            scenarios[f'bullets[b={bullet_count},e={enemy_count}]'] = lambda b=bullet_count, e=enemy_count: self.bullets(b, e)
+        scenarios['rotate_gun'] = lambda: self.rotate_gun(ROTATE_FRAMES)
+        for form in ('nodes', 'compiled'):
+            scenarios[f'behavior[{form},k={BEHAVIOR_COUNT}]'] = lambda form=form: self.behavior(BEHAVIOR_COUNT, form == 'compiled')
+
+        results = {}
+        for name, scenario in scenarios.items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            print(f"  {name}", file=sys.stderr)
+            with redirect_stdout(io.StringIO()):
+                results[name] = scenario()
+        if not only or any('collision'.startswith(prefix) for prefix in only):
+            print("  collision", file=sys.stderr)
+            results.update(self.collision())
+        self.clear()
+        return results
+
+
+def compare(results, baseline):
+    """Cambios de p50/p95 contra una corrida anterior; devuelve cuántas regresiones hubo"""
+    regressions = 0
+    for name, current in sorted(results.items()):
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            if not previous[key]:
+                continue
+            change = (current[key] - previous[key]) / previous[key]
+            flag = 'REGRESIÓN' if change > REGRESSION_THRESHOLD else ''
+            regressions += bool(flag)
+            print(f"{name:<48} {key:<7} {previous[key]:>10.4f} -> {current[key]:>10.4f} {change:>+8.1%} {flag}", file=sys.stderr)
+    return regressions
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Benchmarks sin ventana de Sneaked-away')
+    parser.add_argument('--output', help='Archivo JSON de salida (por defecto, la salida estándar)')
+    parser.add_argument('--baseline', help='JSON de una corrida anterior para comparar')
+    parser.add_argument('--only', nargs='*', help='Prefijos de los escenarios a correr (p. ej. astar draw)')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplicador de la cantidad de frames')
+    args = parser.parse_args()
+
+    print("Corriendo benchmarks...", file=sys.stderr)
+    suite = Suite(args.scale)
+    results = suite.run(args.only)
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'platform': platform.platform(),
+            'seed': SEED,
+            'pathing_mode': ENEMY_PATHING_MODE,
+            'enemy_backend': ENEMY_BACKEND,
+            'rss_peak_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        },
+        'results': results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            file.write(text + '\n')
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(report['results'], json.load(file)['results'])
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,79 @@
+from collections import deque
+from array import array
+
+class FlowField:
+    """Campo de flujo (mapa de Dijkstra) compartido por todos los enemigos.
+
+    Se recalcula una sola vez cuando el objetivo cambia de celda (o la grilla cambia)
+    y cada enemigo lee su siguiente paso en O(1).
+    """
+    UNREACHABLE = -1
+
+    def __init__(self, grid):
+        self.grid = grid
+        size = grid.cols * grid.rows
+        self.distance = array('i', [self.UNREACHABLE]) * size
+        self.next_index = array('i', [self.UNREACHABLE]) * size
+        self.target = None
+        self.grid_version = -1
+
+    def update(self, target):
+        """Recalcula el campo si el objetivo cambió de celda; devuelve True si se recalculó"""
+        target = self.grid.clamp_cell(target)
+        if target == self.target and self.grid_version == self.grid.version:
+            return False
+        self.target = target
+        self.grid_version = self.grid.version
+        self.compute(target)
+        return True
+
+    def compute(self, target):
+        """Búsqueda en anchura desde el objetivo (costo uniforme, 4 direcciones)"""
+        grid = self.grid
+        cols, rows, cells = grid.cols, grid.rows, grid.cells
+        distance, next_index = self.distance, self.next_index
+        size = cols * rows
+        distance[:] = array('i', [self.UNREACHABLE]) * size
+        next_index[:] = array('i', [self.UNREACHABLE]) * size
+
+        # El objetivo se siembra aunque esté bloqueado para que los enemigos se acerquen igual
+        start = target[1] * cols + target[0]
+        distance[start] = 0
+        frontier = deque([start])
+        while frontier:
+            current = frontier.popleft()
+            next_distance = distance[current] + 1
+            x = current % cols
+            for neighbor, valid in ((current - cols, current >= cols),
+                                    (current + cols, current < size - cols),
+                                    (current - 1, x > 0),
+                                    (current + 1, x < cols - 1)):
+                if valid and distance[neighbor] == self.UNREACHABLE and not cells[neighbor]:
+                    distance[neighbor] = next_distance
+                    next_index[neighbor] = current  # Apunta hacia el objetivo
+                    frontier.append(neighbor)
+
+    def distance_at(self, cell):
+        if not self.grid.in_bounds(*cell):
+            return self.UNREACHABLE
+        return self.distance[cell[1] * self.grid.cols + cell[0]]
+
+    def next_cell(self, cell):
+        """Siguiente celda hacia el objetivo, o None si no hay camino o ya se llegó"""
+        if not self.grid.in_bounds(*cell):
+            return None
+        index = self.next_index[cell[1] * self.grid.cols + cell[0]]
+        if index == self.UNREACHABLE:
+            return None
+        return index % self.grid.cols, index // self.grid.cols
+
+    def path_from(self, cell):
+        """Camino completo de celdas desde `cell` hasta el objetivo siguiendo el campo"""
+        if self.distance_at(cell) == self.UNREACHABLE:
+            return []
+        path = [cell]
+        while True:
+            cell = self.next_cell(cell)
+            if cell is None:
+                return path
+            path.append(cell)
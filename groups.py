@@ -1,18 +1,202 @@
 from settings import * 
+from bisect import bisect_left, bisect_right
+from spatial import SpatialHash
+
+class GroundLayer:
+    """Capa de suelo estática pre-renderizada en chunks de GROUND_CHUNK_TILES x GROUND_CHUNK_TILES tiles."""
+    def __init__(self, tiles, map_width, map_height, tile_size=TILE_SIZE, chunk_tiles=GROUND_CHUNK_TILES):
+        self.chunk_size = chunk_tiles * tile_size
+        self.cols = (map_width + chunk_tiles - 1) // chunk_tiles
+        self.rows = (map_height + chunk_tiles - 1) // chunk_tiles
+        self.chunks = {}
+
+        # Hornear cada tile en la superficie de su chunk (una sola vez, al cargar el mapa)
+        for x, y, image in tiles:
+            key = (x // chunk_tiles, y // chunk_tiles)
+            chunk = self.chunks.get(key)
+            if chunk is None:
+                chunk = pygame.Surface((self.chunk_size, self.chunk_size), pygame.SRCALPHA).convert_alpha()
+                self.chunks[key] = chunk
+            chunk.blit(image, ((x % chunk_tiles) * tile_size, (y % chunk_tiles) * tile_size))
+
+    def draw(self, surface, offset):
+        """Dibuja solo los chunks que se solapan con la cámara"""
+        width, height = surface.get_size()
+        left, top = -offset.x, -offset.y
+        first_col = max(0, int(left // self.chunk_size))
+        last_col = min(self.cols - 1, int((left + width) // self.chunk_size))
+        first_row = max(0, int(top // self.chunk_size))
+        last_row = min(self.rows - 1, int((top + height) // self.chunk_size))
+
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                chunk = self.chunks.get((col, row))
+                if chunk:
+                    surface.blit(chunk, (col * self.chunk_size + offset.x, row * self.chunk_size + offset.y))
 
 class AllSprites(pygame.sprite.Group):
+    """Grupo de cámara que mantiene el orden de profundidad (rect.centery) entre frames.
+
+    Los sprites con el atributo de clase ``static`` se ordenan una sola vez al cargar;
+    los móviles se reordenan con una pasada de inserción sobre el orden del frame anterior.
+    """
     def __init__(self):
         super().__init__()
         self.display_surface = pygame.display.get_surface()
         self.offset = pygame.Vector2()
-    
-    def draw(self, target_pos):
+        self.ground_layer = None
+        self.view_rect = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT)
+
+        # Orden de dibujo persistente
+        self.ground_sprites = []
+        self.static_sprites = []
+        self.static_keys = []
+        self.static_margin = 0
+        self.static_dirty = False
+        self.dynamic_sprites = []
+        self.dynamic_listed = set()  # Sprites presentes en dynamic_sprites (incluso ya removidos)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        if getattr(sprite, 'static', False):
+            # El rect todavía no existe: se ordena en el próximo draw
+            self.static_dirty = True
+        else:
+            sprite.previous_topleft = None  # Sin paso anterior: se dibuja donde está
+            if sprite not in self.dynamic_listed:
+                self.dynamic_listed.add(sprite)
+                self.dynamic_sprites.append(sprite)
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        # Los móviles no se buscan en la lista (O(n) por bala o enemigo muerto): quedan
+        # hasta la próxima pasada de visible_dynamic, que descarta a los que ya no están
+        if getattr(sprite, 'static', False):
+            self.static_dirty = True
+
+    def set_ground(self, tiles, map_width, map_height):
+        """Reemplaza los sprites de suelo por una capa pre-renderizada en chunks"""
+        self.ground_layer = GroundLayer(tiles, map_width, map_height)
+
+    def sort_static(self):
+        """Ordena los sprites estáticos por profundidad (solo cuando cambian)"""
+        statics = [sprite for sprite in self.sprites() if getattr(sprite, 'static', False)]
+        self.ground_sprites = sorted((s for s in statics if hasattr(s, 'ground')), key = lambda sprite: sprite.rect.centery)
+        self.static_sprites = sorted((s for s in statics if not hasattr(s, 'ground')), key = lambda sprite: sprite.rect.centery)
+        self.static_keys = [sprite.rect.centery for sprite in self.static_sprites]
+        self.static_margin = max((sprite.rect.height for sprite in self.static_sprites), default = 0)
+        self.static_dirty = False
+
+    def visible_static(self):
+        """Estáticos visibles, en orden, localizados por búsqueda binaria sobre centery"""
+        first = bisect_left(self.static_keys, self.view_rect.top - self.static_margin)
+        last = bisect_right(self.static_keys, self.view_rect.bottom + self.static_margin)
+        view_rect = self.view_rect
+        return [sprite for sprite in self.static_sprites[first:last] if view_rect.colliderect(sprite.rect)]
+
+    def visible_dynamic(self):
+        """Móviles visibles reordenados por inserción; los que están fuera de cámara no se ordenan"""
+        view_rect = self.view_rect
+        members = self.spritedict
+        visible, hidden = [], []
+        for sprite in self.dynamic_sprites:
+            if sprite not in members:
+                self.dynamic_listed.discard(sprite)
+                continue
+            (visible if view_rect.colliderect(sprite.rect) else hidden).append(sprite)
+
+        # El orden del frame anterior está casi ordenado: la inserción es casi O(n)
+        keys = [sprite.rect.centery for sprite in visible]
+        for i in range(1, len(visible)):
+            key, sprite = keys[i], visible[i]
+            j = i - 1
+            while j >= 0 and keys[j] > key:
+                keys[j + 1], visible[j + 1] = keys[j], visible[j]
+                j -= 1
+            keys[j + 1], visible[j + 1] = key, sprite
+
+        self.dynamic_sprites = visible + hidden
+        return visible, keys
+
+    def save_positions(self):
+        """Guarda la posición de los móviles antes de un paso de simulación (para interpolar)"""
+        # También purga los removidos: sin ventana visible_dynamic no corre nunca
+        members = self.spritedict
+        present = []
+        for sprite in self.dynamic_sprites:
+            if sprite in members:
+                sprite.previous_topleft = sprite.rect.topleft
+                present.append(sprite)
+            else:
+                self.dynamic_listed.discard(sprite)
+        self.dynamic_sprites = present
+
+    def interpolated(self, sprite, alpha):
+        """Esquina superior izquierda de `sprite` entre el paso anterior (0) y el actual (1)"""
+        x, y = sprite.rect.topleft
+        previous = getattr(sprite, 'previous_topleft', None)
+        if previous is None or alpha >= 1:
+            return x, y
+        return previous[0] + (x - previous[0]) * alpha, previous[1] + (y - previous[1]) * alpha
+
+    def draw(self, target_pos, alpha=1.0):
+        """Dibuja centrado en `target_pos`; los móviles se interpolan con `alpha` entre pasos"""
         self.offset.x = -(target_pos[0] - WINDOW_WIDTH / 2)
         self.offset.y = -(target_pos[1] - WINDOW_HEIGHT / 2)
+        self.view_rect.topleft = (-self.offset.x, -self.offset.y)
+
+        if self.static_dirty:
+            self.sort_static()
+
+        if self.ground_layer:
+            self.ground_layer.draw(self.display_surface, self.offset)
+
+        blit = self.display_surface.blit
+        offset = self.offset
+        view_rect = self.view_rect
+        for sprite in self.ground_sprites:
+            if view_rect.colliderect(sprite.rect):
+                blit(sprite.image, sprite.rect.topleft + offset)
+
+        # Mezclar las dos secuencias ya ordenadas (estáticos y móviles)
+        statics = self.visible_static()
+        dynamics, dynamic_keys = self.visible_dynamic()
+        i = j = 0
+        while i < len(statics) or j < len(dynamics):
+            if j >= len(dynamics) or (i < len(statics) and statics[i].rect.centery <= dynamic_keys[j]):
+                sprite = statics[i]
+                i += 1
+                blit(sprite.image, sprite.rect.topleft + offset)
+            else:
+                sprite = dynamics[j]
+                j += 1
+                x, y = self.interpolated(sprite, alpha)
+                blit(sprite.image, (x + offset.x, y + offset.y))
+
+class CollisionGroup(pygame.sprite.Group):
+    """Grupo de obstáculos estáticos con un hash espacial para consultas por zona"""
+    def __init__(self, *sprites):
+        self.spatial_hash = SpatialHash()
+        self.dirty = True
+        super().__init__(*sprites)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        self.dirty = True
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        self.dirty = True
+
+    def build(self):
+        """Reconstruye el hash (una vez al cargar el mapa, o si cambian los obstáculos)"""
+        self.spatial_hash.clear()
+        for sprite in self.sprites():
+            self.spatial_hash.insert(sprite, sprite.rect)
+        self.dirty = False
 
-        ground_sprites = [sprite for sprite in self if hasattr(sprite, 'ground')] 
-        object_sprites = [sprite for sprite in self if not hasattr(sprite, 'ground')] 
-        
-        for layer in [ground_sprites, object_sprites]:
-            for sprite in sorted(layer, key = lambda sprite: sprite.rect.centery):
-                self.display_surface.blit(sprite.image, sprite.rect.topleft + self.offset)
\ No newline at end of file
+    def nearby(self, rect):
+        """Obstáculos en las celdas que solapa `rect`"""
+        if self.dirty:
+            self.build()
+        return self.spatial_hash.query(rect)
@@ -0,0 +1,189 @@
+from settings import *
+from simclock import sim_clock
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él se usa el backend por sprite
+    np = None
+
+HORDE_AVAILABLE = np is not None
+
+class EnemyHorde:
+    """Simulación por lotes de enemigos en arrays de NumPy (estructura de arrays).
+
+    Posiciones, direcciones, velocidades, temporizadores de ataque e índices de
+    animación viven en arrays; la persecución, el rango de ataque, el movimiento y la
+    animación se calculan para toda la horda en pasos vectorizados. Los rects de todos
+    los activos se actualizan cada paso; imagen y máscara, solo cerca de la cámara.
+
+    Los obstáculos se resuelven contra la NavGrid (capa Collisions), no contra los rects
+    de collision_sprites.
+    """
+    def __init__(self, grid, player, flow_field=None, capacity=64):
+        self.grid = grid
+        self.player = player
+        self.flow_field = flow_field
+        self.sprites = [None] * capacity
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.allocate(capacity)
+        self.cells = np.frombuffer(grid.cells, dtype=np.uint8)
+        self.view_rect = pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT).inflate(HORDE_SYNC_MARGIN * 2, HORDE_SYNC_MARGIN * 2)
+
+    def allocate(self, capacity):
+        """Crea (o agranda, copiando) los arrays de estado"""
+        old = getattr(self, 'pos', None)
+        count = 0 if old is None else len(old)
+        arrays = {
+            'pos': np.zeros((capacity, 2)),
+            'direction': np.zeros((capacity, 2)),
+            'speed': np.zeros(capacity),
+            'attack_range': np.zeros(capacity),
+            'attack_cooldown': np.zeros(capacity),
+            'last_attack': np.zeros(capacity),
+            'attack_animation': np.zeros(capacity),
+            'attacking': np.zeros(capacity, dtype=bool),
+            'frame_index': np.zeros(capacity),
+            'frame_count': np.ones(capacity),
+            'animation_speed': np.zeros(capacity),
+            'active': np.zeros(capacity, dtype=bool),
+        }
+        for name, array in arrays.items():
+            if old is not None:
+                array[:count] = getattr(self, name)
+            setattr(self, name, array)
+
+    def add(self, enemy):
+        """Registra un enemigo: su estado pasa a los arrays"""
+        if not self.free_slots:
+            capacity = len(self.sprites)
+            self.allocate(capacity * 2)
+            self.sprites.extend([None] * capacity)
+            self.free_slots = list(range(capacity * 2 - 1, capacity - 1, -1))
+        slot = self.free_slots.pop()
+        self.sprites[slot] = enemy
+        enemy.horde, enemy.horde_slot = self, slot
+
+        self.pos[slot] = enemy.rect.center
+        self.direction[slot] = 0
+        self.speed[slot] = enemy.speed
+        self.attack_range[slot] = enemy.attack_range
+        self.attack_cooldown[slot] = enemy.attack_cooldown
+        self.last_attack[slot] = enemy.last_attack_time
+        self.attack_animation[slot] = 0
+        self.attacking[slot] = False
+        self.frame_index[slot] = 0
+        self.frame_count[slot] = len(enemy.frames)
+        self.animation_speed[slot] = enemy.animation_speed
+        self.active[slot] = True
+
+    def deactivate(self, enemy):
+        """El enemigo deja de simularse (muriendo); conserva su slot hasta `remove`"""
+        self.active[enemy.horde_slot] = False
+
+    def remove(self, enemy):
+        slot = enemy.horde_slot
+        self.active[slot] = False
+        self.sprites[slot] = None
+        self.free_slots.append(slot)
+        enemy.horde, enemy.horde_slot = None, None
+
+    def update(self, dt):
+        active = self.active
+        if not active.any():
+            return
+        now = sim_clock.get_ticks()
+        player = self.player
+        target = np.array(player.rect.center, dtype=float)
+
+        # Rango de ataque para toda la horda
+        delta = target - self.pos
+        distance = np.hypot(delta[:, 0], delta[:, 1])
+        in_range = active & (distance < self.attack_range) if player.is_alive else np.zeros_like(active)
+
+        # Ataques: el cooldown se evalúa en bloque y el daño se aplica uno por uno
+        attackers = in_range & (now - self.last_attack >= self.attack_cooldown)
+        if attackers.any():
+            self.last_attack[attackers] = now
+            self.attack_animation[attackers] = now
+            self.attacking[attackers] = True
+            self.direction[attackers] = 0
+            for slot in np.flatnonzero(attackers):
+                if player.is_alive:
+                    player.take_damage(self.sprites[slot].attack_damage)
+
+        # Persecución: siguiente celda del campo de flujo o directo al jugador
+        chasing = active & ~in_range & player.is_alive
+        goal = np.broadcast_to(target, self.pos.shape)
+        if self.flow_field is not None and self.flow_field.target is not None:
+            goal = self.flow_goals(goal)
+        heading = goal - self.pos
+        length = np.hypot(heading[:, 0], heading[:, 1])
+        moving = chasing & (length > 0)
+        self.direction[moving] = heading[moving] / length[moving, None]
+        if not player.is_alive:
+            self.direction[active] = 0
+
+        # Movimiento por eje con bloqueo contra la grilla de navegación
+        mobile = active & ~self.attacking
+        step = self.direction * (self.speed * dt)[:, None]
+        stuck = self.blocked(self.pos)  # Si ya está dentro de un obstáculo puede salir
+        for axis in (0, 1):
+            moved = self.pos.copy()
+            moved[:, axis] += step[:, axis]
+            apply = mobile & (~self.blocked(moved) | stuck)
+            self.pos[apply, axis] = moved[apply, axis]
+
+        # Animación
+        speed = np.where(self.attacking, self.animation_speed * 1.5, self.animation_speed)
+        self.frame_index[active] += speed[active] * dt
+        self.attacking[self.attacking & (now - self.attack_animation > 300)] = False
+
+        self.sync(active)
+
+    def flow_goals(self, goal):
+        """Centro de la siguiente celda del campo de flujo para cada enemigo"""
+        grid = self.grid
+        size = grid.tile_size
+        cell_x = np.clip((self.pos[:, 0] // size).astype(np.int64), 0, grid.cols - 1)
+        cell_y = np.clip((self.pos[:, 1] // size).astype(np.int64), 0, grid.rows - 1)
+        next_index = np.frombuffer(self.flow_field.next_index, dtype=np.int32)[cell_y * grid.cols + cell_x]
+        target_index = self.flow_field.target[1] * grid.cols + self.flow_field.target[0]
+        follow = (next_index >= 0) & (next_index != target_index)
+        cell_goal = np.stack(((next_index % grid.cols) * size + size // 2,
+                              (next_index // grid.cols) * size + size // 2), axis=1).astype(float)
+        return np.where(follow[:, None], cell_goal, goal)
+
+    def blocked(self, positions):
+        grid = self.grid
+        cell_x = (positions[:, 0] // grid.tile_size).astype(np.int64)
+        cell_y = (positions[:, 1] // grid.tile_size).astype(np.int64)
+        inside = (cell_x >= 0) & (cell_x < grid.cols) & (cell_y >= 0) & (cell_y < grid.rows)
+        index = np.where(inside, cell_y * grid.cols + cell_x, 0)
+        return ~inside | (self.cells[index] != 0)
+
+    def sync(self, active):
+        """Copia la posición a todos los enemigos activos; imagen y máscara solo a los cercanos a la cámara.
+
+        Los rects se actualizan siempre porque enemy_grid, el ray-cast de las balas y
+        nearby_enemies los leen en todo el mapa, no solo dentro de la cámara.
+        """
+        slots = np.flatnonzero(active)
+        centers_x = self.pos[slots, 0].astype(np.int64).tolist()
+        centers_y = self.pos[slots, 1].astype(np.int64).tolist()
+        sprites = self.sprites
+        for slot, center in zip(slots.tolist(), zip(centers_x, centers_y)):
+            enemy = sprites[slot]
+            enemy.rect.center = center
+            enemy.hitbox_rect.center = center
+
+        self.view_rect.center = self.player.rect.center
+        left, top, right, bottom = self.view_rect.left, self.view_rect.top, self.view_rect.right, self.view_rect.bottom
+        x, y = self.pos[:, 0], self.pos[:, 1]
+        visible = active & (x >= left) & (x <= right) & (y >= top) & (y <= bottom)
+        frames = (self.frame_index.astype(np.int64) % self.frame_count.astype(np.int64))
+        for slot in np.flatnonzero(visible):
+            enemy = sprites[slot]
+            index = frames[slot]
+            enemy.image = enemy.frames[index]
+            enemy.mask = enemy.masks[index]
+            enemy.is_attacking = bool(self.attacking[slot])
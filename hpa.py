@@ -0,0 +1,218 @@
+import heapq
+from weakref import WeakKeyDictionary
+from settings import *
+from astar import AStar, as_navgrid, heuristic
+
+class HierarchicalPathfinder:
+    """Pathfinding jerárquico (HPA*) sobre una NavGrid.
+
+    La grilla se divide en clusters de HPA_CLUSTER_SIZE x HPA_CLUSTER_SIZE celdas. Al
+    cargar el mapa se calculan las entradas entre clusters vecinos y el costo entre
+    entradas del mismo cluster; una consulta busca sobre ese grafo abstracto y solo
+    refina a celdas los primeros tramos, los que están cerca del agente.
+    """
+    def __init__(self, grid, cluster_size=HPA_CLUSTER_SIZE):
+        self.grid = grid
+        self.cluster_size = cluster_size
+        self.engine = AStar(grid)  # Motor propio para búsquedas acotadas a un cluster
+        self.cluster_cols = (grid.cols + cluster_size - 1) // cluster_size
+        self.cluster_rows = (grid.rows + cluster_size - 1) // cluster_size
+
+        self.borders = {}   # (cluster_a, cluster_b) -> [(celda_a, celda_b)]
+        self.inter = {}     # celda -> [(celda vecina en otro cluster, costo)]
+        self.intra = {}     # cluster -> {celda: [(celda del mismo cluster, costo)]}
+        self.dirty = set()  # Clusters con celdas modificadas pendientes de actualizar
+
+        for cy in range(self.cluster_rows):
+            for cx in range(self.cluster_cols):
+                if cx + 1 < self.cluster_cols:
+                    self.build_border((cx, cy), (cx + 1, cy))
+                if cy + 1 < self.cluster_rows:
+                    self.build_border((cx, cy), (cx, cy + 1))
+        self.rebuild_inter()
+        for cy in range(self.cluster_rows):
+            for cx in range(self.cluster_cols):
+                self.build_intra((cx, cy))
+
+        grid.add_listener(self.on_cell_changed)
+        _pathfinders[grid] = self
+
+    # --- Construcción ---------------------------------------------------------
+
+    def cluster_of(self, cell):
+        return cell[0] // self.cluster_size, cell[1] // self.cluster_size
+
+    def cluster_bounds(self, cluster):
+        x0, y0 = cluster[0] * self.cluster_size, cluster[1] * self.cluster_size
+        return x0, y0, min(x0 + self.cluster_size, self.grid.cols), min(y0 + self.cluster_size, self.grid.rows)
+
+    def build_border(self, a, b):
+        """Entradas sobre el borde compartido entre dos clusters adyacentes"""
+        x0, y0, x1, y1 = self.cluster_bounds(a)
+        if b[0] > a[0]:
+            # Borde vertical: columna x1 - 1 de `a` frente a la columna x1 de `b`
+            pairs = [((x1 - 1, y), (x1, y)) for y in range(y0, y1)]
+        else:
+            # Borde horizontal: fila y1 - 1 de `a` frente a la fila y1 de `b`
+            pairs = [((x, y1 - 1), (x, y1)) for x in range(x0, x1)]
+
+        transitions = []
+        segment = []
+        for pair in pairs + [None]:
+            if pair and self.grid.is_walkable(*pair[0]) and self.grid.is_walkable(*pair[1]):
+                segment.append(pair)
+                continue
+            if segment:
+                # Segmentos cortos: una entrada al centro; largos: una en cada extremo
+                if len(segment) < 6:
+                    transitions.append(segment[len(segment) // 2])
+                else:
+                    transitions.extend((segment[0], segment[-1]))
+                segment = []
+        self.borders[(a, b)] = transitions
+
+    def rebuild_inter(self):
+        self.inter = {}
+        for transitions in self.borders.values():
+            for cell_a, cell_b in transitions:
+                self.inter.setdefault(cell_a, []).append((cell_b, 1))
+                self.inter.setdefault(cell_b, []).append((cell_a, 1))
+
+    def cluster_nodes(self, cluster):
+        """Celdas de entrada que pertenecen a un cluster"""
+        cx, cy = cluster
+        nodes = set()
+        for a, b, side in (((cx - 1, cy), cluster, 1), ((cx, cy - 1), cluster, 1),
+                           (cluster, (cx + 1, cy), 0), (cluster, (cx, cy + 1), 0)):
+            for transition in self.borders.get((a, b), ()):
+                nodes.add(transition[side])
+        return nodes
+
+    def build_intra(self, cluster):
+        """Costos entre las entradas de un cluster, con A* acotado al cluster"""
+        bounds = self.cluster_bounds(cluster)
+        nodes = sorted(self.cluster_nodes(cluster))
+        edges = {node: [] for node in nodes}
+        for i, node in enumerate(nodes):
+            for other in nodes[i + 1:]:
+                path = self.engine.find_path(node, other, bounds)
+                if path and path[-1] == other:
+                    edges[node].append((other, len(path) - 1))
+                    edges[other].append((node, len(path) - 1))
+        self.intra[cluster] = edges
+
+    # --- Actualización incremental -------------------------------------------
+
+    def on_cell_changed(self, x, y):
+        self.dirty.add(self.cluster_of((x, y)))
+
+    def flush(self):
+        """Actualiza solo los clusters modificados (y los costos de sus vecinos de borde)"""
+        if not self.dirty:
+            return
+        affected = set()
+        for cluster in self.dirty:
+            cx, cy = cluster
+            for a, b in (((cx - 1, cy), cluster), ((cx, cy - 1), cluster),
+                         (cluster, (cx + 1, cy)), (cluster, (cx, cy + 1))):
+                if (a, b) in self.borders:
+                    self.build_border(a, b)
+                    affected.update((a, b))
+            affected.add(cluster)
+        self.dirty.clear()
+        self.rebuild_inter()
+        for cluster in affected:
+            self.build_intra(cluster)
+
+    # --- Consultas -----------------------------------------------------------
+
+    def link(self, cell, cluster, to_cell):
+        """Conecta temporalmente una celda con las entradas de su cluster"""
+        bounds = self.cluster_bounds(cluster)
+        links = []
+        for node in self.intra.get(cluster, {}):
+            path = self.engine.find_path(cell, node, bounds) if to_cell else self.engine.find_path(node, cell, bounds)
+            target = node if to_cell else cell
+            if path and path[-1] == target:
+                links.append((node, len(path) - 1))
+        return links
+
+    def abstract_path(self, start, goal):
+        """A* sobre el grafo de entradas; devuelve la lista de celdas de paso"""
+        start_cluster, goal_cluster = self.cluster_of(start), self.cluster_of(goal)
+        start_links = self.link(start, start_cluster, True)
+        goal_links = dict(self.link(goal, goal_cluster, False))
+
+        open_set = [(heuristic(start, goal), 0, start)]
+        g_score = {start: 0}
+        came_from = {}
+        while open_set:
+            _, current_g, current = heapq.heappop(open_set)
+            if current_g > g_score[current]:
+                continue
+            if current == goal:
+                waypoints = [current]
+                while current in came_from:
+                    current = came_from[current]
+                    waypoints.append(current)
+                return waypoints[::-1]
+
+            neighbors = self.intra[self.cluster_of(current)].get(current, []) + self.inter.get(current, [])
+            if current == start:
+                neighbors = neighbors + start_links
+            if current in goal_links:
+                neighbors.append((goal, goal_links[current]))
+            for neighbor, cost in neighbors:
+                tentative_g = current_g + cost
+                if tentative_g < g_score.get(neighbor, float('inf')):
+                    g_score[neighbor] = tentative_g
+                    came_from[neighbor] = current
+                    heapq.heappush(open_set, (tentative_g + heuristic(neighbor, goal), tentative_g, neighbor))
+        return []
+
+    def refine(self, waypoints, segments=None):
+        """Convierte los primeros `segments` tramos abstractos en celdas"""
+        path = [waypoints[0]]
+        last = len(waypoints) - 1 if segments is None else min(segments, len(waypoints) - 1)
+        for a, b in zip(waypoints[:last], waypoints[1:last + 1]):
+            if abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1:
+                path.append(b)  # Transición entre clusters vecinos
+                continue
+            bounds = self.cluster_bounds(self.cluster_of(a)) if self.cluster_of(a) == self.cluster_of(b) else None
+            segment = self.engine.find_path(a, b, bounds)
+            if not segment or segment[-1] != b:
+                break
+            path.extend(segment[1:])
+        return path
+
+    def find_path(self, start, goal, refine_segments=HPA_REFINE_SEGMENTS):
+        """Camino de celdas de start hacia goal, refinado solo cerca del agente"""
+        start, goal = tuple(start), tuple(goal)
+        self.flush()
+        if not (self.grid.is_walkable(*start) and self.grid.is_walkable(*goal)):
+            return []
+        if start == goal:
+            return [start]
+
+        # Dentro del mismo cluster basta una búsqueda acotada
+        if self.cluster_of(start) == self.cluster_of(goal):
+            path = self.engine.find_path(start, goal, self.cluster_bounds(self.cluster_of(start)))
+            if path and path[-1] == goal:
+                return path
+
+        waypoints = self.abstract_path(start, goal)
+        if not waypoints:
+            # Sin camino abstracto: A* completo con su respaldo al punto más cercano
+            return self.engine.find_path(start, goal)
+        return self.refine(waypoints, refine_segments)
+
+
+# Un pathfinder jerárquico por grilla (en Game.setup en el modo 'hpa', o en la primera consulta)
+_pathfinders = WeakKeyDictionary()
+
+def hpa_pathfinding(start, goal, grid):
+    grid = as_navgrid(grid)
+    pathfinder = _pathfinders.get(grid)
+    if pathfinder is None:
+        pathfinder = HierarchicalPathfinder(grid)
+    return pathfinder.find_path(start, goal)
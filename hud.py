@@ -0,0 +1,96 @@
+from collections import OrderedDict
+from settings import *
+
+class FontRegistry:
+    """Fuentes cargadas una sola vez, por (archivo, tamaño)"""
+    def __init__(self):
+        self.fonts = {}
+
+    def get(self, size, name=None):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is None:
+            font = pygame.font.Font(name, size)
+            self.fonts[key] = font
+        return font
+
+class TextCache:
+    """Superficies de texto ya renderizadas, indexadas por (fuente, texto, color), con desalojo LRU"""
+    def __init__(self, max_entries=HUD_TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surf = self.entries.get(key)
+        if surf is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return surf
+
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self.entries[key] = surf
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return surf
+
+    def stats(self):
+        return {'entries': len(self.entries), 'hits': self.hits, 'misses': self.misses}
+
+# Compartidos por todo el juego (sobreviven a los reinicios)
+fonts = FontRegistry()
+text_cache = TextCache()
+
+def render_text(size, text, color):
+    """Texto con la fuente por defecto en `size`, desde la caché"""
+    return text_cache.render(fonts.get(size), text, color)
+
+class HudPanel:
+    """Zona de la interfaz con su propia superficie, del tamaño justo de lo que muestra"""
+    def __init__(self, rect):
+        self.rect = pygame.Rect(rect)
+        # Se compone sobre `canvas`; `surface` es su copia en RLE (dibujar sobre una
+        # superficie RLE con pygame.draw no es seguro)
+        self.canvas = pygame.Surface(self.rect.size, pygame.SRCALPHA).convert_alpha()
+        self.surface = self.canvas.copy()
+        self.state = None
+
+class Hud:
+    """Interfaz compuesta en paneles transparentes, uno por zona de la pantalla.
+
+    Cada panel se vuelve a dibujar solo cuando cambia su parte del estado (una tupla con
+    los valores que muestra) y ocupa solo su zona: recibir daño recompone la barra de
+    salud y el contador, no una superficie del tamaño de la ventana. Se guardan en RLE.
+    """
+    def __init__(self):
+        self.panels = {}
+        self.redraws = 0
+
+    def update(self, name, rect, state, draw):
+        """Recompone el panel `name` (zona `rect`) con `draw(surface)` si `state` cambió.
+
+        `draw` dibuja en coordenadas del panel: (0, 0) es la esquina de `rect`.
+        """
+        panel = self.panels.get(name)
+        if panel is None or panel.rect != rect:
+            panel = self.panels[name] = HudPanel(rect)
+        if state == panel.state:
+            return
+        panel.state = state
+        self.redraws += 1
+        panel.canvas.fill((0, 0, 0, 0))
+        draw(panel.canvas)
+        panel.surface = panel.canvas.copy()
+        panel.surface.set_alpha(255, pygame.RLEACCEL)
+
+    def draw(self, target):
+        for panel in self.panels.values():
+            target.blit(panel.surface, panel.rect)
+
+    def reset(self):
+        """Fuerza a recomponer todos los paneles en el próximo frame"""
+        for panel in self.panels.values():
+            panel.state = None
@@ -1,15 +1,43 @@
 from settings import *
 from player import Player
 from sprites import *
-from pytmx.util_pygame import load_pygame
-from groups import AllSprites
-from behavior_tree import Selector, Sequence, Action
+from groups import AllSprites, CollisionGroup
+from spatial import DynamicGrid
 from astar import astar_pathfinding
-from random import randint, choice
+from flowfield import FlowField
+from hpa import HierarchicalPathfinder, hpa_pathfinding
+from pathcache import PathCache
+from pathscheduler import PathScheduler
+from pathworker import PathWorkerPool
+from random import randint, choice, seed as random_seed
+from os import environ
+from time import perf_counter
+from argparse import ArgumentParser
+from simclock import sim_clock
+from pool import SpritePool
+from horde import EnemyHorde, HORDE_AVAILABLE
+from ai_lod import ThinkScheduler
+from steering import Steering
+from projectiles import ProjectileCaster
+from hud import Hud, render_text, text_cache
+from assets import assets
+from mapcache import load_map
 
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, max_steps=0, seed=None):
+        # Modo sin ventana: drivers dummy de SDL, sin display.update y sin esperar al reloj
+        self.headless = headless
+        self.max_steps = max_steps
+        self.seed = seed
+        if headless:
+            environ['SDL_VIDEODRIVER'] = 'dummy'
+            environ['SDL_AUDIODRIVER'] = 'dummy'
+        if seed is not None:
+            random_seed(seed)
+        sim_clock.reset()
+        self.steps = 0
+
         # setup
         pygame.init()
         self.display_surface = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
@@ -21,17 +49,19 @@ class Game:
         pygame.joystick.init()
         self.setup_joysticks()
 
-        # Inicializar grilla del mapa con más claridad
-        self.grid_rows = GRID_ROWS
-        self.grid_cols = GRID_COLS
-        print(f"Inicializando grid de {self.grid_rows} filas x {self.grid_cols} columnas")
-        self.grid = [[0 for _ in range(self.grid_cols)] for _ in range(self.grid_rows)]
+        # La grilla de navegación se dimensiona con el mapa en setup()
+        self.grid = None
 
         # groups
         self.all_sprites = AllSprites()
-        self.collision_sprites = pygame.sprite.Group()
+        self.collision_sprites = CollisionGroup()
         self.bullet_sprites = pygame.sprite.Group()
         self.enemy_sprites = pygame.sprite.Group()
+        # Fase amplia para balas y jugador contra enemigos (se reconstruye cada frame)
+        self.enemy_grid = DynamicGrid(ENEMY_GRID_CELL_SIZE)
+        # Pools de balas y enemigos: se reciclan en lugar de crearse en cada disparo o spawn
+        self.bullet_pool = SpritePool(Bullet, BULLET_POOL_SIZE)
+        self.enemy_pool = SpritePool(Enemy, ENEMY_POOL_SIZE)
 
         # Contador de enemigos eliminados
         self.enemies_killed = 0
@@ -42,15 +72,16 @@ class Game:
         self.can_shoot = True
         self.shoot_time = 0
         self.gun_cooldown = 100
-        self.enemy_event = pygame.event.custom_type()
-        pygame.time.set_timer(self.enemy_event, 300)
+        self.spawn_timer = 0  # ms simulados desde el último spawn (ENEMY_SPAWN_INTERVAL)
         self.spawn_positions = []
+        # Interfaz compuesta por paneles: cada uno se redibuja solo cuando cambia lo que muestra
+        self.hud = Hud()
 
-        # audio
-        self.shoot_sound = pygame.mixer.Sound(join('audio', 'shoot.wav'))
+        # audio (cargado una sola vez por el administrador de recursos)
+        self.shoot_sound = assets.sound('audio', 'shoot.wav')
         self.shoot_sound.set_volume(0.2)
-        self.impact_sound = pygame.mixer.Sound(join('audio', 'impact.ogg'))
-        self.music = pygame.mixer.Sound(join('audio', 'music.wav'))
+        self.impact_sound = assets.sound('audio', 'impact.ogg')
+        self.music = assets.sound('audio', 'music.wav')
         self.music.set_volume(0.5)
         # self.music.play(loops = -1)
 
@@ -58,8 +89,9 @@ class Game:
         self.load_images()
         self.setup()
         
-        # Imprimir información sobre la grilla después de cargarla
+        # Imprimir información sobre la grilla y los recursos después de cargarlos
         self.print_grid_summary()
+        self.print_asset_stats()
 
     def setup_joysticks(self):
         """Configurar joysticks conectados"""
@@ -82,25 +114,54 @@ class Game:
 
     def print_grid_summary(self):
         """Imprime un resumen de la grilla para depuración"""
-        obstacle_count = sum(row.count(1) for row in self.grid)
-        total_cells = self.grid_rows * self.grid_cols
+        obstacle_count = self.grid.obstacle_count()
+        total_cells = self.grid.rows * self.grid.cols
         print(f"Resumen de la grilla:")
-        print(f"- Tamaño: {self.grid_rows} x {self.grid_cols} = {total_cells} celdas")
+        print(f"- Tamaño: {self.grid.rows} x {self.grid.cols} = {total_cells} celdas")
         print(f"- Obstáculos: {obstacle_count} ({obstacle_count/total_cells*100:.1f}%)")
         print(f"- Celdas transitables: {total_cells - obstacle_count} ({(total_cells-obstacle_count)/total_cells*100:.1f}%)")
 
+    def print_path_stats(self):
+        """Imprime los contadores de la caché de caminos"""
+        for mode, pathfinder in self.pathfinders.items():
+            if isinstance(pathfinder, PathCache):
+                stats = pathfinder.stats()
+                if stats['hits'] + stats['suffix_hits'] + stats['misses']:
+                    print(f"Caché de caminos ({mode}): {stats}")
+
+    def print_pool_stats(self):
+        """Imprime el máximo de objetos vivos (high-water) de cada pool"""
+        for name, pool in (('balas', self.bullet_pool), ('enemigos', self.enemy_pool)):
+            print(f"Pool de {name}: {pool.stats()}")
+
+    def print_asset_stats(self):
+        """Memoria de los recursos por grupo y lecturas de disco acumuladas"""
+        for group, stats in assets.memory_report().items():
+            print(f"Recursos {group}: {stats}")
+
     def load_images(self):
-        self.bullet_surf = pygame.image.load(join('images', 'gun', 'bullet.png')).convert_alpha()
+        # Imágenes, máscaras y siluetas salen del administrador de recursos: tras el
+        # primer arranque, un reinicio no vuelve a leer nada del disco
+        self.bullet_surf = assets.image('images', 'gun', 'bullet.png', group='gun')
+        self.bullet_mask = assets.derived(('mask', 'bullet'), lambda: pygame.mask.from_surface(self.bullet_surf))
+        # Radio de impacto de la bala: la mitad de su parte visible
+        visible = self.bullet_mask.get_bounding_rects()
+        self.bullet_radius = max(visible[0].size) / 2 if visible else 0
 
-        folders = list(walk(join('images', 'enemies')))[0][1]
         self.enemy_frames = {}
-        for folder in folders:
-            for folder_path, _, file_names in walk(join('images', 'enemies', folder)):
-                self.enemy_frames[folder] = []
-                for file_name in sorted(file_names, key=lambda name: int(name.split('.')[0])):
-                    full_path = join(folder_path, file_name)
-                    surf = pygame.image.load(full_path).convert_alpha()
-                    self.enemy_frames[folder].append(surf)
+        self.enemy_masks = {}
+        self.enemy_death_surfs = {}
+        for enemy_type in assets.subfolders('images', 'enemies'):
+            frames = assets.folder_frames('images', 'enemies', enemy_type, group='enemies')
+            self.enemy_frames[enemy_type] = frames
+            # Atlas de máscaras: una por frame y la silueta de muerte de cada tipo de enemigo
+            self.enemy_masks[enemy_type] = assets.frame_masks(('enemies', enemy_type), frames)
+            self.enemy_death_surfs[enemy_type] = assets.derived(('death', enemy_type), lambda: self.death_silhouette(enemy_type))
+
+    def death_silhouette(self, enemy_type):
+        death_surf = self.enemy_masks[enemy_type][0].to_surface()
+        death_surf.set_colorkey('black')
+        return death_surf
 
     def input(self):
         # Detectar disparos desde teclado o joystick
@@ -124,60 +185,106 @@ class Game:
         """Método para disparar"""
         self.shoot_sound.play()
         pos = self.gun.rect.center + self.gun.player_direction * 50
-        Bullet(self.bullet_surf, pos, self.gun.player_direction, (self.all_sprites, self.bullet_sprites))
+        self.bullet_pool.acquire(self.bullet_surf, pos, self.gun.player_direction, (self.all_sprites, self.bullet_sprites), self.bullet_mask)
         self.can_shoot = False
-        self.shoot_time = pygame.time.get_ticks()
+        self.shoot_time = sim_clock.get_ticks()
 
     def gun_timer(self):
         if not self.can_shoot:
-            current_time = pygame.time.get_ticks()
+            current_time = sim_clock.get_ticks()
             if current_time - self.shoot_time >= self.gun_cooldown:
                 self.can_shoot = True
 
     def setup(self):
-        map = load_pygame(join('data', 'maps', 'world.tmx'))
-
-        for x, y, image in map.get_layer_by_name('Ground').tiles():
-            Sprite((x * TILE_SIZE, y * TILE_SIZE), image, self.all_sprites)
-
-        for obj in map.get_layer_by_name('Objects'):
-            CollisionSprite((obj.x, obj.y), obj.image, (self.all_sprites, self.collision_sprites))
+        # Mapa precompilado (mmap): sin XML en el arranque; se recompila si el .tmx cambió
+        start = perf_counter()
+        map = load_map(join('data', 'maps', 'world.tmx'))
+        origin = 'compilado desde el .tmx' if map.compiled else 'leído de la caché'
+        print(f"Mapa {origin} en {(perf_counter() - start) * 1000:.1f} ms")
+
+        # El suelo es estático: se hornea en chunks en lugar de crear un sprite por tile
+        self.all_sprites.set_ground(map.ground_tiles(), map.cols, map.rows)
+
+        for x, y, image in map.objects():
+            CollisionSprite((x, y), image, (self.all_sprites, self.collision_sprites))
+        # Los obstáculos no se mueven: el hash espacial se construye una sola vez
+        self.collision_sprites.build()
             
-        # Marcar objetos de colisión en la grilla con más verificaciones
-        collision_count = 0
-        for obj in map.get_layer_by_name('Collisions'):
-            grid_x, grid_y = int(obj.x // TILE_SIZE), int(obj.y // TILE_SIZE)
-            if 0 <= grid_y < self.grid_rows and 0 <= grid_x < self.grid_cols:
-                self.grid[grid_y][grid_x] = 1  # Marca la celda como obstáculo
-                collision_count += 1
-            else:
-                print(f"ADVERTENCIA: Objeto de colisión fuera de rango en ({grid_x}, {grid_y})")
+        # Grilla de navegación del tamaño del mapa: las celdas que cubren los objetos
+        # de colisión ya vienen marcadas en el artefacto
+        self.grid = map.nav_grid()
+        print(f"Inicializando grid de {self.grid.rows} filas x {self.grid.cols} columnas")
+        collision_count = self.grid.obstacle_count()
         
         print(f"Se marcaron {collision_count} celdas como obstáculos")
 
-        for obj in map.get_layer_by_name('Entities'):
-            if obj.name == 'Player':
-                self.player = Player((obj.x, obj.y), self.all_sprites, self.collision_sprites)
+        # Ray-cast de balas contra enemigos y obstáculos
+        self.projectiles = ProjectileCaster(self.enemy_grid, self.collision_sprites)
+
+        # Campo de flujo compartido hacia el jugador para toda la horda
+        self.flow_field = FlowField(self.grid)
+        # Entradas y costos entre clusters para el modo 'hpa' (se precalculan al cargar solo en
+        # ese modo; si no, hpa_pathfinding lo arma la primera vez que se lo llama)
+        self.hpa = HierarchicalPathfinder(self.grid) if ENEMY_PATHING_MODE == 'hpa' else None
+        # Pathfinders por modo, con caché de caminos delante si está activada
+        self.pathfinders = {'astar': astar_pathfinding, 'hpa': hpa_pathfinding}
+        if PATH_CACHE_ENABLED:
+            # Los caminos de HPA* se refinan solo cerca del agente: no se cachean truncados
+            self.pathfinders = {mode: PathCache(self.grid, pathfinder, partial=(mode != 'hpa')) for mode, pathfinder in self.pathfinders.items()}
+        # Pedidos A* fuera de la búsqueda síncrona: en procesos trabajadores o
+        # repartidos entre frames con presupuesto fijo
+        self.path_requests = None
+        cache = self.pathfinders['astar'] if PATH_CACHE_ENABLED else None
+        if PATH_WORKERS:
+            self.path_requests = PathWorkerPool(self.grid, PATH_WORKERS, cache)
+        elif PATH_SCHEDULER_ENABLED:
+            self.path_requests = PathScheduler(self.grid, cache)
+
+        for name, x, y in map.entities():
+            if name == 'Player':
+                self.player_spawn = (x, y)
+                self.player = Player(self.player_spawn, self.all_sprites, self.collision_sprites)
                 self.gun = Gun(self.player, self.all_sprites)
                 
                 # Registrar posición del jugador en coordenadas de grid
-                player_grid_x = int(obj.x // TILE_SIZE)
-                player_grid_y = int(obj.y // TILE_SIZE)
-                print(f"Jugador inicializado en posición mundial ({obj.x}, {obj.y})")
+                player_grid_x, player_grid_y = self.grid.world_to_cell(x, y)
+                print(f"Jugador inicializado en posición mundial ({x}, {y})")
                 print(f"Posición del jugador en grid: ({player_grid_x}, {player_grid_y})")
-            elif obj.name == 'Enemy':
+            elif name == 'Enemy':
                 # También registrar posiciones de spawn de enemigos
-                self.spawn_positions.append((obj.x, obj.y))
-                spawn_grid_x = int(obj.x // TILE_SIZE)
-                spawn_grid_y = int(obj.y // TILE_SIZE)
+                self.spawn_positions.append((x, y))
+                spawn_grid_x, spawn_grid_y = self.grid.world_to_cell(x, y)
                 print(f"Posición de spawn de enemigos en grid: ({spawn_grid_x}, {spawn_grid_y})")
 
+        # Foto de la grilla recién cargada: restart_game restaura solo lo que haya cambiado
+        self.grid_snapshot = bytes(self.grid.cells)
+
+        # Frecuencia de pensamiento de cada enemigo según su distancia al jugador
+        self.think_scheduler = ThinkScheduler(self.player) if AI_LOD_ENABLED else None
+
+        # Steering de la horda: los vecinos salen de la grilla de enemigos de cada frame
+        self.steering = Steering(self.enemy_grid, self.grid) if STEERING_ENABLED else None
+
+        # Simulación por lotes de la horda en arrays de NumPy (opcional)
+        self.horde = None
+        if ENEMY_BACKEND == 'numpy':
+            if HORDE_AVAILABLE:
+                self.horde = EnemyHorde(self.grid, self.player, self.flow_field if ENEMY_PATHING_MODE == 'flowfield' else None)
+            else:
+                print("ADVERTENCIA: NumPy no está instalado, se usa el backend 'sprites'")
+
+    def nearby_enemies(self, sprite):
+        """Enemigos que tocan a `sprite`: celdas de la grilla, luego rect y al final máscara"""
+        rect = sprite.rect
+        return [enemy for enemy in self.enemy_grid.query(rect)
+                if rect.colliderect(enemy.rect) and pygame.sprite.collide_mask(sprite, enemy)]
+
     def bullet_collision(self):
+        if BULLET_SWEPT_COLLISION:
+            return self.swept_bullet_collision()
         if self.bullet_sprites:
             for bullet in self.bullet_sprites:
-                collision_sprites = pygame.sprite.spritecollide(
-                    bullet, self.enemy_sprites, False, pygame.sprite.collide_mask
-                )
+                collision_sprites = self.nearby_enemies(bullet)
                 if collision_sprites:
                     self.impact_sound.play()
                     for sprite in collision_sprites:
@@ -189,30 +296,63 @@ class Game:
                     if self.enemies_killed >= self.enemies_to_win:
                         self.victory = True
 
+    def swept_bullet_collision(self):
+        """Cada bala prueba el tramo que recorrió en el frame y se queda con el primer impacto"""
+        for bullet in self.bullet_sprites:
+            hit = self.projectiles.cast(bullet.previous, bullet.rect.center, self.bullet_radius)
+            if hit is None:
+                continue
+            bullet.kill()
+            t, target, is_enemy = hit
+            if not is_enemy:
+                continue  # Las balas se detienen en los obstáculos
+
+            self.impact_sound.play()
+            target.destroy()
+            self.enemies_killed += 1
+
+            # Comprobar condición de victoria
+            if self.enemies_killed >= self.enemies_to_win:
+                self.victory = True
+
     def player_collision(self):
         # Si el jugador está en colisión con los enemigos
-        if pygame.sprite.spritecollide(self.player, self.enemy_sprites, False, pygame.sprite.collide_mask):
+        if self.nearby_enemies(self.player):
             self.player.take_damage(2)  # Reducir vida del jugador gradualmente
 
     def handle_player_health(self):
         """Maneja la visualización de la salud del jugador"""
         if self.player.is_alive:
-            # Dibujar la barra de salud
-            self.player.draw_health_bar(self.display_surface)
-            
-            # Dibujar texto de salud en la esquina
-            font = pygame.font.Font(None, 32)
-            health_text = font.render(f"Salud: {self.player.health}", True, (255, 255, 255))
-            self.display_surface.blit(health_text, (20, 20))
-            
-            # Mostrar contador de enemigos eliminados
-            kill_text = font.render(f"Enemigos eliminados: {self.enemies_killed}/{self.enemies_to_win}", True, (255, 255, 255))
-            self.display_surface.blit(kill_text, (20, 60))
-
-    def draw_joystick_help(self):
+            # Cada panel guarda los valores que muestra: si ninguno cambió, se usa tal cual
+            player = self.player
+            self.hud.update('health_bar', self.health_bar_area(),
+                            (player.health, player.is_showing_damage(), player.last_damage_amount), self.draw_health_bar)
+            self.hud.update('counters', HUD_COUNTERS_AREA,
+                            (player.health, self.enemies_killed, self.enemies_to_win), self.draw_counters)
+            self.hud.update('joystick_help', HUD_JOYSTICK_HELP_AREA,
+                            pygame.joystick.get_count() > 0, self.draw_joystick_help)
+            self.hud.draw(self.display_surface)
+
+    def health_bar_area(self):
+        """Zona de la barra de salud: sobre el jugador, que siempre está en el centro de la pantalla"""
+        top = int(WINDOW_HEIGHT / 2 - self.player.rect.height / 2 - 10) - 20
+        return pygame.Rect((WINDOW_WIDTH // 2 - 25, top), HUD_HEALTH_BAR_SIZE)
+
+    def draw_health_bar(self, surface):
+        """Compone el panel de la barra de salud (la barra queda a 20 px del borde superior)"""
+        self.player.draw_health_bar(surface, (25, 30 + self.player.rect.height / 2))
+
+    def draw_counters(self, surface):
+        """Compone el panel de textos de la esquina"""
+        surface.blit(render_text(32, f"Salud: {self.player.health}", (255, 255, 255)), (0, 0))
+
+        # Mostrar contador de enemigos eliminados
+        kill_text = render_text(32, f"Enemigos eliminados: {self.enemies_killed}/{self.enemies_to_win}", (255, 255, 255))
+        surface.blit(kill_text, (0, 40))
+
+    def draw_joystick_help(self, surface):
         """Muestra información de ayuda sobre controles de joystick"""
         if pygame.joystick.get_count() > 0:
-            font = pygame.font.Font(None, 24)
             help_text = [
                 "Controles de Joystick:",
                 "- Stick Izquierdo: Mover",
@@ -221,24 +361,24 @@ class Game:
             ]
             
             for i, text in enumerate(help_text):
-                rendered = font.render(text, True, (200, 200, 200))
-                self.display_surface.blit(rendered, (WINDOW_WIDTH - 250, 20 + i * 25))
+                rendered = render_text(24, text, (200, 200, 200))
+                surface.blit(rendered, (0, i * 25))
 
     def game_over_screen(self, victory=False):
+        self.print_path_stats()
+        self.print_pool_stats()
+        print(f"Caché de textos: {text_cache.stats()}, recomposiciones de la interfaz: {self.hud.redraws}")
         # Pantalla de "Game Over" o "Victoria"
-        font = pygame.font.Font(None, 74)
-        small_font = pygame.font.Font(None, 50)
-
-        # Textos
+        # Textos (fuentes del registro y superficies de la caché de textos)
         if victory:
-            main_text = font.render("¡VICTORIA!", True, (0, 255, 0))
-            subtitle = small_font.render(f"Has eliminado {self.enemies_killed} enemigos", True, (255, 255, 255))
+            main_text = render_text(74, "¡VICTORIA!", (0, 255, 0))
+            subtitle = render_text(50, f"Has eliminado {self.enemies_killed} enemigos", (255, 255, 255))
         else:
-            main_text = font.render("GAME OVER", True, (255, 0, 0))
-            subtitle = small_font.render(f"Eliminaste {self.enemies_killed} de {self.enemies_to_win} enemigos", True, (255, 255, 255))
+            main_text = render_text(74, "GAME OVER", (255, 0, 0))
+            subtitle = render_text(50, f"Eliminaste {self.enemies_killed} de {self.enemies_to_win} enemigos", (255, 255, 255))
         
-        restart_text = small_font.render("Presiona R o A para reiniciar", True, (255, 255, 255))
-        exit_text = small_font.render("Presiona Q o B para salir", True, (255, 255, 255))
+        restart_text = render_text(50, "Presiona R o A para reiniciar", (255, 255, 255))
+        exit_text = render_text(50, "Presiona Q o B para salir", (255, 255, 255))
 
         # Dibujar en pantalla
         self.display_surface.fill((0, 0, 0))  # Fondo negro
@@ -270,14 +410,59 @@ class Game:
                         exit()
 
     def restart_game(self):
-        # Reiniciar el juego por completo
-        self.__init__()
-        self.run()
+        """Reinicia la partida en el lugar, en milisegundos.
+
+        Mapa, sprites estáticos, grilla de navegación, pathfinders y recursos quedan como
+        los dejó setup(); solo se restaura el estado que cambia durante una partida, incluidas
+        las cachés y colas de caminos, para que una corrida con semilla se repita igual.
+        """
+        start = perf_counter()
+
+        # Enemigos y balas vuelven a sus pools (y salen de la horda y de los pedidos de camino)
+        for enemy in list(self.enemy_sprites):
+            if self.path_requests:
+                self.path_requests.cancel(enemy)
+            enemy.kill()
+        for bullet in list(self.bullet_sprites):
+            bullet.kill()
+        self.enemy_grid.rebuild(())
+
+        # Cachés y colas de caminos de la sesión anterior: un acierto de caché se entrega en
+        # el mismo frame y una búsqueda uno después, así que una caché tibia cambia la partida
+        for pathfinder in self.pathfinders.values():
+            if isinstance(pathfinder, PathCache):
+                pathfinder.clear()
+        if isinstance(self.path_requests, PathScheduler):
+            self.path_requests.close()
+        self.flow_field.target = None  # El próximo paso recalcula el campo desde cero
+
+        # Celdas de la grilla que hayan cambiado vuelven a la foto (avisando a HPA* y trabajadores)
+        cells = self.grid_snapshot
+        if self.grid.cells != cells:
+            for index, value in enumerate(cells):
+                self.grid.set_walkable(index % self.grid.cols, index // self.grid.cols, not value)
+
+        # Jugador, arma, contadores y temporizadores
+        self.player.reset(self.player_spawn)
+        self.gun.reset()
+        self.enemies_killed = 0
+        self.victory = False
+        self.can_shoot = True
+        self.shoot_time = 0
+        self.spawn_timer = 0
+        self.steps = 0
+        sim_clock.reset()
+        if self.seed is not None:
+            random_seed(self.seed)
+        self.think_scheduler = ThinkScheduler(self.player) if AI_LOD_ENABLED else None
+        self.hud.reset()
+
+        print(f"Sesión reiniciada en {(perf_counter() - start) * 1000:.2f} ms")
 
     def render_grid_overlay(self):
         """Dibuja una representación visual de la grid para depuración"""
-        for y in range(self.grid_rows):
-            for x in range(self.grid_cols):
+        for y in range(self.grid.rows):
+            for x in range(self.grid.cols):
                 rect = pygame.Rect(
                     x * TILE_SIZE + self.all_sprites.offset.x,
                     y * TILE_SIZE + self.all_sprites.offset.y,
@@ -285,7 +470,7 @@ class Game:
                 )
                 
                 # Dibujar celdas de diferentes colores según su contenido
-                if self.grid[y][x] == 1:  # Obstáculo
+                if not self.grid.is_walkable(x, y):  # Obstáculo
                     pygame.draw.rect(self.display_surface, (255, 0, 0, 100), rect, 1)
                 else:  # Celda transitable
                     pygame.draw.rect(self.display_surface, (0, 255, 0, 100), rect, 1)
@@ -296,42 +481,46 @@ class Game:
             pos = choice(self.spawn_positions)
             enemy_type = choice(list(self.enemy_frames.keys()))
             
-            # Crear árbol de comportamiento para el enemigo
-            pathfind_sequence = Sequence([
-                Action(lambda e: self.calculate_path(e)),
-                Action(lambda e: e.follow_path())
-            ])
-            
-            chase_action = Action(lambda e: e.chase_player(self.player))
-            behavior_tree = Selector([pathfind_sequence, chase_action])
-            
-            # Crear el enemigo con el árbol de comportamiento
-            Enemy(
+            # Tomar un enemigo del pool (o crearlo); el árbol de comportamiento es compartido
+            enemy = self.enemy_pool.acquire(
                 pos,
                 self.enemy_frames[enemy_type],
                 (self.all_sprites, self.enemy_sprites),
                 self.player,
                 self.collision_sprites,
-                self.grid
+                self.grid,
+                self.flow_field,
+                pathfinder=self.pathfinders.get(ENEMY_PATHING_MODE),
+                path_requests=self.path_requests if ENEMY_PATHING_MODE == 'astar' else None,
+                masks=self.enemy_masks[enemy_type],
+                death_surf=self.enemy_death_surfs[enemy_type],
+                think_scheduler=self.think_scheduler,
+                steering=self.steering
             )
+            if self.horde:
+                self.horde.add(enemy)
 
-    def calculate_path(self, enemy):
-        """Calcula un camino desde el enemigo hasta el jugador usando A*"""
+    def calculate_path(self, enemy, mode=None):
+        """Calcula un camino desde el enemigo hasta el jugador usando A*, HPA* o el campo de flujo"""
+        mode = mode or enemy.pathing_mode
         # Convertir posiciones a coordenadas de grid
-        start_x, start_y = int(enemy.pos.x // TILE_SIZE), int(enemy.pos.y // TILE_SIZE)
-        goal_x, goal_y = int(self.player.pos.x // TILE_SIZE), int(self.player.pos.y // TILE_SIZE)
+        start = self.grid.world_to_cell(*enemy.rect.center)
+        goal = self.grid.world_to_cell(*self.player.pos)
         
         # Verificar límites
-        if (0 <= start_y < self.grid_rows and 0 <= start_x < self.grid_cols and
-            0 <= goal_y < self.grid_rows and 0 <= goal_x < self.grid_cols):
+        if self.grid.in_bounds(*start) and self.grid.in_bounds(*goal):
             
-            # Calcular camino usando A*
-            path = astar_pathfinding((start_x, start_y), (goal_x, goal_y), self.grid)
+            if mode == 'flowfield':
+                # El campo ya apunta al jugador: solo hay que recorrerlo
+                self.flow_field.update(goal)
+                path = self.flow_field.path_from(start)
+            else:
+                # Calcular camino usando A* o HPA* (a través de la caché si está activada)
+                path = self.pathfinders.get(mode, self.pathfinders['astar'])(start, goal, self.grid)
             
             if path:
                 # Convertir coordenadas de grid a coordenadas del mundo
-                world_path = [(x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2) 
-                             for x, y in path]
+                world_path = [self.grid.cell_to_world(cell) for cell in path]
                 enemy.path = world_path
                 return True
         
@@ -339,52 +528,108 @@ class Game:
         enemy.path = []
         return
     
+    def step(self, dt):
+        """Un paso fijo de simulación de `dt` segundos"""
+        sim_clock.advance(dt)
+        self.steps += 1
+
+        # Spawns con el reloj simulado (no con un timer de pygame) para que sean reproducibles
+        self.spawn_timer += dt * 1000
+        while self.spawn_timer >= ENEMY_SPAWN_INTERVAL:
+            self.spawn_timer -= ENEMY_SPAWN_INTERVAL
+            self.create_enemy()
+
+        self.all_sprites.save_positions()
+        self.input()
+        self.gun_timer()
+        # Un solo recálculo del campo de flujo cuando el jugador cambia de celda, y solo
+        # si alguien lo sigue: en los otros modos el BFS de toda la grilla sobra
+        if ENEMY_PATHING_MODE == 'flowfield' or self.horde:
+            self.flow_field.update(self.grid.world_to_cell(*self.player.rect.center))
+        if self.think_scheduler:
+            self.think_scheduler.begin_frame()
+        self.all_sprites.update(dt)
+        if self.horde:
+            self.horde.update(dt)
+        if self.path_requests:
+            self.path_requests.update()
+        self.enemy_grid.rebuild(self.enemy_sprites)
+        self.bullet_collision()
+        self.player_collision()
+
+    def render(self, alpha=1.0):
+        """Dibuja el estado interpolado `alpha` (0..1) entre el paso anterior y el actual"""
+        self.display_surface.fill('black')
+        # La cámara sigue la posición interpolada del jugador
+        x, y = self.all_sprites.interpolated(self.player, alpha)
+        self.all_sprites.draw((x + self.player.rect.width / 2, y + self.player.rect.height / 2), alpha)
+
+        # Interfaz de usuario
+        self.handle_player_health()
+
+        pygame.display.update()
+
+    def print_headless_stats(self, elapsed):
+        """Resumen de una corrida sin ventana: rendimiento puro de la simulación"""
+        print(f"\nSimulación sin ventana: {self.steps} pasos en {elapsed:.2f} s "
+              f"({self.steps / elapsed if elapsed else 0:.0f} pasos/s)")
+        print(f"  Tiempo simulado: {sim_clock.get_ticks()} ms, enemigos vivos: {len(self.enemy_sprites)}, "
+              f"eliminados: {self.enemies_killed}, vida del jugador: {self.player.health}")
+        self.print_path_stats()
+        self.print_pool_stats()
+
     def run(self):
-        """Bucle principal del juego"""
+        """Bucle principal: simulación a paso fijo (SIM_RATE) y renderizado interpolado aparte"""
+        step_dt = 1 / SIM_RATE
+        accumulator = 0.0
+        start = perf_counter()
         while self.running:
             # Eventos
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
-                if event.type == self.enemy_event:
-                    self.create_enemy()
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_ESCAPE:
                         self.running = False
-            
-            # Verificar si el juego ha terminado
-            if not self.player.is_alive:
-                result = self.game_over_screen(victory=False)
-                if result == "restart":
-                    self.restart_game()
-                    return
-            
-            if self.victory:
-                result = self.game_over_screen(victory=True)
+
+            # Sin ventana no hay pantalla de fin: la corrida termina aquí
+            if self.headless and (not self.player.is_alive or self.victory):
+                break
+
+            # Verificar si el juego ha terminado (si el jugador sigue vivo, es una victoria)
+            if not self.player.is_alive or self.victory:
+                result = self.game_over_screen(victory=self.player.is_alive)
                 if result == "restart":
+                    # Reinicio en el lugar: el bucle sigue plano, sin recursión
                     self.restart_game()
-                    return
-            
-            # Input y actualizaciones
-            dt = self.clock.tick() / 1000
-            self.input()
-            self.gun_timer()
-            self.all_sprites.update(dt)
-            self.bullet_collision()
-            self.player_collision()
-            
-            # Renderizado
-            self.display_surface.fill('black')
-            # CORRECCIÓN: Pasar la posición del jugador en lugar del objeto jugador
-            self.all_sprites.draw(self.player.rect.center)
-            
-            # Interfaz de usuario
-            self.handle_player_health()
-            
-            pygame.display.update()
+                    accumulator = 0.0
+                    self.clock.tick()  # Descartar el tiempo pasado en la pantalla de fin
+                    continue
+
+            if self.headless:
+                # Un paso por vuelta, tan rápido como permita la CPU
+                self.step(step_dt)
+            else:
+                # Acumulador: el tiempo real se consume en pasos fijos y el resto se interpola
+                accumulator += min(self.clock.tick(RENDER_FPS) / 1000, MAX_FRAME_TIME)
+                while accumulator >= step_dt:
+                    self.step(step_dt)
+                    accumulator -= step_dt
+                self.render(accumulator / step_dt)
+
+            if self.max_steps and self.steps >= self.max_steps:
+                self.running = False
+
+        if self.headless:
+            self.print_headless_stats(perf_counter() - start)
 
 
 # Punto de entrada para iniciar el juego
 if __name__ == "__main__":
-    game = Game()
-    game.run()
\ No newline at end of file
+    parser = ArgumentParser(description='Sneaked-away')
+    parser.add_argument('--headless', action='store_true', help='Sin ventana ni audio: solo la simulación, lo más rápido posible')
+    parser.add_argument('--steps', type=int, default=0, help='Terminar tras N pasos de simulación (0 = sin límite)')
+    parser.add_argument('--seed', type=int, default=None, help='Semilla aleatoria para corridas reproducibles')
+    args = parser.parse_args()
+    game = Game(headless=args.headless, max_steps=args.steps, seed=args.seed)
+    game.run()
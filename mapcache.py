@@ -0,0 +1,330 @@
+"""Caché binaria precompilada de los mapas de Tiled.
+
+`compile_map` lee el .tmx con pytmx una sola vez y escribe junto a él un artefacto con
+todo lo que Game.setup necesita: los gids del suelo, los objetos, los rectángulos de
+colisión, las entidades, las celdas de la NavGrid ya marcadas y, por cada gid usado,
+de qué archivo y región sale su imagen. `load_map` abre el artefacto con mmap y expone
+las secciones como memoryviews tipados, sin parsear XML. El encabezado guarda la firma
+(ruta, mtime, tamaño y hash) del .tmx y de cada archivo del que depende: los tilesets
+.tsx externos y las imágenes. Si alguno cambió (mtime o tamaño distintos y además otro
+hash) lo vuelve a compilar; si solo cambiaron fechas (un checkout, un touch) renueva las
+firmas guardadas para no recalcular los hashes en cada arranque. Un artefacto dañado o
+truncado se trata como si no existiera.
+
+Formato (little-endian):
+  MAGIC (8 bytes) | largo del encabezado (uint32) | encabezado JSON (utf-8)
+  secciones alineadas a 8 bytes; el encabezado guarda (offset, bytes, typecode) de cada una
+"""
+import hashlib
+import json
+import mmap
+import struct
+import sys
+from array import array
+from os import replace, stat
+from os.path import dirname, normpath, relpath
+from xml.etree import ElementTree
+from settings import *
+from navgrid import NavGrid
+from assets import assets
+
+MAGIC = b'SNKMAP\x00\x01'
+FORMAT_VERSION = 2
+PREFIX = struct.Struct('<8sI')
+ALIGN = 8
+HEADER_KEYS = ('source', 'cols', 'rows', 'tile_size', 'names', 'images', 'sections')
+SECTIONS = ('ground', 'object_pos', 'object_gid', 'collisions', 'entity_pos', 'entity_name', 'nav')
+SOURCE_KEYS = {'path', 'mtime_ns', 'size', 'sha1'}
+
+def align(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+def source_signature(path):
+    info = stat(path)
+    return info.st_mtime_ns, info.st_size
+
+def file_hash(path):
+    with open(path, 'rb') as file:
+        return hashlib.sha1(file.read()).hexdigest()
+
+def describe_source(path, base):
+    """Firma de un archivo del que sale el artefacto, con la ruta relativa a `base`"""
+    mtime_ns, size = source_signature(path)
+    return {'path': relpath(normpath(path), base).replace('\\', '/'), 'mtime_ns': mtime_ns, 'size': size, 'sha1': file_hash(path)}
+
+def map_sources(source, tmx):
+    """El .tmx, sus tilesets .tsx externos y las imágenes que usan, sin repetir"""
+    base = dirname(source)
+    paths = [source]
+    # pytmx resuelve los .tsx pero no guarda su ruta: se leen del propio .tmx
+    for tileset in ElementTree.parse(source).getroot().iter('tileset'):
+        if tileset.get('source'):
+            paths.append(join(base, tileset.get('source')))
+    paths.extend(reference[0] for reference in tmx.images if reference)
+    unique = {}
+    for path in paths:
+        unique.setdefault(normpath(path), path)
+    return list(unique)
+
+def image_reference(filename, colorkey, **kwargs):
+    """Cargador de imágenes para pytmx que no lee nada: solo anota de dónde sale cada tile"""
+    def load(rect=None, flags=None):
+        return filename, colorkey, rect, flags
+    return load
+
+def compile_map(source):
+    """Lee el .tmx con pytmx y devuelve los bytes del artefacto"""
+    from pytmx import TiledMap  # Solo el compilador depende de pytmx
+    tmx = TiledMap(source, image_loader=image_reference)
+    cols, rows = tmx.width, tmx.height
+
+    ground = array('I', bytes(4 * cols * rows))
+    for x, y, gid in tmx.get_layer_by_name('Ground').iter_data():
+        ground[y * cols + x] = gid
+
+    object_pos, object_gid = array('d'), array('I')
+    for obj in tmx.get_layer_by_name('Objects'):
+        object_pos.extend((obj.x, obj.y))
+        object_gid.append(obj.gid)
+
+    # La grilla se marca aquí, una vez por compilación y no en cada arranque
+    grid = NavGrid(cols, rows, tmx.tilewidth)
+    collisions = array('d')
+    for obj in tmx.get_layer_by_name('Collisions'):
+        collisions.extend((obj.x, obj.y, obj.width, obj.height))
+        grid.mark_rect(obj.x, obj.y, obj.width, obj.height)
+
+    names, entity_pos, entity_name = [], array('d'), array('I')
+    for obj in tmx.get_layer_by_name('Entities'):
+        if obj.name not in names:
+            names.append(obj.name)
+        entity_pos.extend((obj.x, obj.y))
+        entity_name.append(names.index(obj.name))
+
+    base = dirname(source)
+    images = {}
+    for gid in sorted(set(ground) | set(object_gid)):
+        if not gid:
+            continue
+        filename, colorkey, rect, flags = tmx.images[gid]
+        images[str(gid)] = {
+            'path': relpath(normpath(filename), base).replace('\\', '/'),
+            'colorkey': str(colorkey).lstrip('#') if colorkey else None,
+            'rect': list(rect) if rect else None,
+            'flip': [bool(flags.flipped_horizontally), bool(flags.flipped_vertically), bool(flags.flipped_diagonally)] if flags else [False] * 3,
+        }
+
+    sections = {
+        'ground': ground,
+        'object_pos': object_pos,
+        'object_gid': object_gid,
+        'collisions': collisions,
+        'entity_pos': entity_pos,
+        'entity_name': entity_name,
+        'nav': array('B', grid.cells),
+    }
+    table, blobs, offset = {}, [], 0
+    for name, values in sections.items():
+        if sys.byteorder != 'little':
+            values = array(values.typecode, values)
+            values.byteswap()
+        data = values.tobytes()
+        table[name] = [offset, len(data), values.typecode]
+        blobs.append(data + bytes(align(len(data)) - len(data)))
+        offset += align(len(data))
+
+    return encode({
+        'version': FORMAT_VERSION,
+        'source': [describe_source(path, base) for path in map_sources(source, tmx)],
+        'cols': cols,
+        'rows': rows,
+        'tile_size': tmx.tilewidth,
+        'names': names,
+        'images': images,
+        'sections': table,
+    }, b''.join(blobs))
+
+def encode(header, body):
+    """Bytes del artefacto: prefijo, encabezado JSON y secciones ya alineadas"""
+    text = json.dumps(header, sort_keys=True).encode('utf-8')
+    prefix = PREFIX.pack(MAGIC, len(text)) + text
+    return prefix + bytes(align(len(prefix)) - len(prefix)) + body
+
+def read_header(buffer):
+    """Encabezado del artefacto, o None si no es uno válido de esta versión o está dañado"""
+    if len(buffer) < PREFIX.size:
+        return None
+    magic, length = PREFIX.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        return None
+    try:
+        header = json.loads(bytes(buffer[PREFIX.size:PREFIX.size + length]).decode('utf-8'))
+    except ValueError:
+        return None
+    if not isinstance(header, dict) or header.get('version') != FORMAT_VERSION:
+        return None
+    header['data_start'] = align(PREFIX.size + length)
+    if not valid_layout(header, len(buffer)):
+        return None
+    return header
+
+def valid_layout(header, length):
+    """Comprueba el encabezado antes de crear vistas: claves, firmas y que cada sección
+    entre completa en los `length` bytes del archivo (un artefacto truncado no pasa)"""
+    try:
+        if any(key not in header for key in HEADER_KEYS):
+            return False
+        if not all(isinstance(record, dict) and SOURCE_KEYS <= record.keys() for record in header['source']):
+            return False
+        cols, rows, sections = header['cols'], header['rows'], header['sections']
+        if set(sections) != set(SECTIONS):
+            return False
+        for offset, size, typecode in sections.values():
+            if offset < 0 or size < 0 or size % array(typecode).itemsize:
+                return False
+            if header['data_start'] + offset + size > length:
+                return False
+        # El suelo y la grilla tienen una entrada por celda
+        return sections['ground'][1] == 4 * cols * rows and sections['nav'][1] == cols * rows
+    except (AttributeError, TypeError, ValueError):
+        return False
+
+def check_sources(header, base):
+    """'fresh' si ningún archivo fuente cambió, 'touched' si solo cambiaron fechas o None si
+    alguno cambió de contenido o ya no existe"""
+    state = 'fresh'
+    for record in header['source']:
+        path = join(base, record['path'])
+        try:
+            if (record['mtime_ns'], record['size']) == source_signature(path):
+                continue
+            if record['sha1'] != file_hash(path):
+                return None
+        except OSError:
+            return None
+        state = 'touched'
+    return state
+
+def refresh_signature(buffer, header, base):
+    """El mismo artefacto con la fecha y el tamaño actuales de sus fuentes (su contenido no cambió)"""
+    header = dict(header)
+    data_start = header.pop('data_start')
+    sources = []
+    for record in header['source']:
+        mtime_ns, size = source_signature(join(base, record['path']))
+        sources.append(dict(record, mtime_ns=mtime_ns, size=size))
+    header['source'] = sources
+    return encode(header, bytes(buffer[data_start:]))
+
+def save(target, data):
+    try:
+        # Escritura atómica: otro proceso nunca ve un artefacto a medias
+        with open(target + '.tmp', 'wb') as file:
+            file.write(data)
+        replace(target + '.tmp', target)
+    except OSError as error:
+        print(f"ADVERTENCIA: no se pudo guardar {target}: {error}")
+
+
+class CompiledMap:
+    """Mapa precompilado: las secciones del artefacto como arrays de solo lectura.
+
+    Las imágenes no viajan en el artefacto: se arman con el administrador de recursos
+    a partir del archivo y la región que anotó el compilador.
+    """
+    def __init__(self, source, buffer, header, compiled=False):
+        self.source = source
+        self.base = dirname(source)
+        self.buffer = buffer  # mmap (o bytes recién compilados); las vistas dependen de él
+        self.compiled = compiled
+        self.cols, self.rows, self.tile_size = header['cols'], header['rows'], header['tile_size']
+        self.names = header['names']
+        self.images = {int(gid): reference for gid, reference in header['images'].items()}
+        self.surfaces = {}  # gid -> superficie ya resuelta
+
+        data_start = header['data_start']
+        view = memoryview(buffer)
+        for name, (offset, size, typecode) in header['sections'].items():
+            section = view[data_start + offset:data_start + offset + size]
+            if sys.byteorder == 'little':
+                values = section.cast(typecode)
+            else:
+                values = array(typecode, section.tobytes())
+                values.byteswap()
+            setattr(self, name, values)
+
+    def image(self, gid, group='map'):
+        """Superficie del gid: el archivo pasa por el administrador y el recorte se hace una vez"""
+        surf = self.surfaces.get(gid)
+        if surf is None:
+            surf = self.surfaces[gid] = self.build_image(gid, group)
+        return surf
+
+    def build_image(self, gid, group):
+        reference = self.images[gid]
+        surf = assets.image(self.base, *reference['path'].split('/'), group=group)
+        rect, flip, colorkey = reference['rect'], reference['flip'], reference['colorkey']
+        if not (rect or any(flip) or colorkey):
+            return surf
+
+        def build():
+            tile = surf.subsurface(rect) if rect else surf
+            if flip[2]:
+                tile = pygame.transform.flip(pygame.transform.rotate(tile, 270), True, False)
+            if flip[0] or flip[1]:
+                tile = pygame.transform.flip(tile, flip[0], flip[1])
+            if colorkey:
+                tile = tile.convert()
+                tile.set_colorkey(pygame.Color(f'#{colorkey}'), pygame.RLEACCEL)
+            return tile
+        return assets.derived((self.source, gid), build)
+
+    def ground_tiles(self):
+        """(x, y, superficie) de cada tile del suelo, como Layer.tiles() de pytmx"""
+        cols = self.cols
+        for index, gid in enumerate(self.ground):
+            if gid:
+                yield index % cols, index // cols, self.image(gid, 'tiles')
+
+    def objects(self):
+        """(x, y, superficie) de cada objeto del mapa"""
+        positions = self.object_pos
+        for index, gid in enumerate(self.object_gid):
+            yield positions[index * 2], positions[index * 2 + 1], self.image(gid, 'objects')
+
+    def entities(self):
+        """(nombre, x, y) de cada entidad (Player, Enemy)"""
+        positions = self.entity_pos
+        for index, name in enumerate(self.entity_name):
+            yield self.names[name], positions[index * 2], positions[index * 2 + 1]
+
+    def nav_grid(self):
+        """NavGrid con los obstáculos ya marcados; copia las celdas porque la grilla cambia"""
+        return NavGrid(self.cols, self.rows, self.tile_size, cells=bytearray(self.nav))
+
+def load_map(source, cache=MAP_CACHE_ENABLED):
+    """Abre el artefacto de `source` con mmap, compilándolo antes si falta o quedó viejo"""
+    target = source + MAP_CACHE_SUFFIX
+    if cache:
+        try:
+            with open(target, 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # No existe o está vacío
+            buffer = None
+        if buffer is not None:
+            header = read_header(buffer)
+            state = check_sources(header, dirname(source)) if header else None
+            if state == 'fresh':
+                return CompiledMap(source, buffer, header)
+            if state == 'touched':
+                # Solo cambiaron fechas: se guardan las firmas nuevas y no se recompila
+                data = refresh_signature(buffer, header, dirname(source))
+                buffer.close()
+                save(target, data)
+                return CompiledMap(source, data, read_header(data))
+            buffer.close()
+
+    data = compile_map(source)
+    if cache:
+        save(target, data)
+    return CompiledMap(source, data, read_header(data), compiled=True)
@@ -0,0 +1,88 @@
+from settings import *
+from math import ceil
+
+class NavGrid:
+    """Grilla de navegación del mapa completo: 0 = transitable, 1 = obstáculo.
+
+    Las celdas se guardan en un bytearray plano (fila mayor) para tener acceso O(1)
+    sin listas anidadas.
+    """
+    def __init__(self, cols, rows, tile_size=TILE_SIZE, cells=None):
+        self.cols = cols
+        self.rows = rows
+        self.tile_size = tile_size
+        self.cells = cells if cells is not None else bytearray(cols * rows)
+        self.version = 0  # Aumenta cada vez que cambia la transitabilidad
+        self.listeners = []  # Callables (x, y) avisados cuando cambia una celda
+
+    @classmethod
+    def from_rows(cls, rows, tile_size=TILE_SIZE):
+        """Convierte una grilla antigua (lista de listas) en una NavGrid"""
+        grid = cls(len(rows[0]), len(rows), tile_size)
+        for y, row in enumerate(rows):
+            for x, value in enumerate(row):
+                if value:
+                    grid.cells[y * grid.cols + x] = 1
+        return grid
+
+    def in_bounds(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows
+
+    def is_walkable(self, x, y):
+        return 0 <= x < self.cols and 0 <= y < self.rows and not self.cells[y * self.cols + x]
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def notify(self, x, y):
+        for callback in self.listeners:
+            callback(x, y)
+
+    def set_walkable(self, x, y, walkable):
+        """Cambia la transitabilidad de una celda"""
+        value = 0 if walkable else 1
+        index = y * self.cols + x
+        if self.cells[index] != value:
+            self.cells[index] = value
+            self.version += 1
+            self.notify(x, y)
+
+    def mark_rect(self, x, y, width, height):
+        """Marca como obstáculo todas las celdas que cubre un rectángulo del mundo"""
+        first_x = max(0, int(x // self.tile_size))
+        first_y = max(0, int(y // self.tile_size))
+        last_x = min(self.cols, ceil((x + width) / self.tile_size))
+        last_y = min(self.rows, ceil((y + height) / self.tile_size))
+
+        marked = 0
+        for cell_y in range(first_y, last_y):
+            row = cell_y * self.cols
+            for cell_x in range(first_x, last_x):
+                if not self.cells[row + cell_x]:
+                    self.cells[row + cell_x] = 1
+                    marked += 1
+                    self.notify(cell_x, cell_y)
+        if marked:
+            self.version += 1
+        return marked
+
+    def world_to_cell(self, x, y):
+        """Convierte coordenadas del mundo a coordenadas de celda (sin recortar)"""
+        return int(x // self.tile_size), int(y // self.tile_size)
+
+    def clamp_cell(self, cell):
+        """Recorta una celda a los límites de la grilla"""
+        return (max(0, min(self.cols - 1, cell[0])),
+                max(0, min(self.rows - 1, cell[1])))
+
+    def cell_to_world(self, cell):
+        """Centro de una celda en coordenadas del mundo"""
+        half = self.tile_size // 2
+        return cell[0] * self.tile_size + half, cell[1] * self.tile_size + half
+
+    def obstacle_count(self):
+        return self.cells.count(1)
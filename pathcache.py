@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from settings import *
+from astar import astar_pathfinding
+
+class PathCache:
+    """Caché LRU de caminos delante de un pathfinder con firma (start, goal, grid).
+
+    Las entradas se indexan por (celda inicial, celda objetivo) y ocupan a lo sumo
+    `max_cells` celdas en total. Si la celda inicial ya está sobre un camino conocido
+    hacia el mismo objetivo se devuelve su sufijo (un tramo de un camino óptimo también
+    es óptimo). Toda la caché se invalida cuando cambia la versión de la grilla.
+
+    Con `partial=False` solo se guardan caminos que llegan al objetivo: HPA* devuelve
+    tramos refinados a medias que no deben quedar como la respuesta de (start, goal).
+    """
+    def __init__(self, grid, pathfinder=astar_pathfinding, max_cells=PATH_CACHE_MAX_CELLS, partial=True):
+        self.grid = grid
+        self.pathfinder = pathfinder
+        self.partial = partial  # Guardar también el respaldo de A* al punto más cercano
+        self.max_cells = max_cells
+        self.entries = OrderedDict()  # (start, goal) -> tupla de celdas
+        self.suffixes = {}            # goal -> {celda: ((start, goal), índice en el camino)}
+        self.cells = 0
+        self.grid_version = grid.version
+
+        # Contadores para comprobar que la caché compensa
+        self.hits = 0
+        self.suffix_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __call__(self, start, goal, grid=None):
+        return self.find_path(start, goal)
+
+    def find_path(self, start, goal):
+        start, goal = tuple(start), tuple(goal)
+        self.validate()
+
+        path = self.lookup(start, goal)
+        if path is not None:
+            return path
+
+        path = self.pathfinder(start, goal, self.grid)
+        self.store((start, goal), path)
+        return path
+
+    def lookup(self, start, goal):
+        """Camino cacheado (exacto o sufijo) o None, sin calcular nada.
+
+        Un None cuenta como fallo: quien llama (find_path, PathScheduler o PathWorkerPool)
+        calcula el camino por su cuenta y lo guarda con `store`.
+        """
+        key = (start, goal)
+        path = self.entries.get(key)
+        if path is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return list(path)
+
+        known = self.suffixes.get(goal, {}).get(start)
+        if known:
+            owner, index = known
+            self.entries.move_to_end(owner)
+            self.suffix_hits += 1
+            return list(self.entries[owner][index:])
+        self.misses += 1
+        return None
+
+    def validate(self):
+        """Invalida toda la caché si la grilla cambió"""
+        if self.grid.version != self.grid_version:
+            self.clear()
+            self.invalidations += 1
+            self.grid_version = self.grid.version
+
+    def store(self, key, path):
+        if not path or len(path) > self.max_cells:
+            return
+        if not self.partial and path[-1] != key[1]:
+            return
+        path = tuple(path)
+        self.entries[key] = path
+        self.cells += len(path)
+
+        # Solo los caminos que llegan al objetivo sirven para reutilizar sufijos
+        goal = key[1]
+        if path[-1] == goal:
+            index = self.suffixes.setdefault(goal, {})
+            for i, cell in enumerate(path[:-1]):
+                index[cell] = (key, i)
+
+        while self.cells > self.max_cells:
+            self.evict()
+
+    def evict(self):
+        key, path = self.entries.popitem(last=False)
+        self.cells -= len(path)
+        self.evictions += 1
+        index = self.suffixes.get(key[1])
+        if index:
+            for cell in path:
+                if index.get(cell, (None,))[0] == key:
+                    del index[cell]
+            if not index:
+                del self.suffixes[key[1]]
+
+    def clear(self):
+        self.entries.clear()
+        self.suffixes.clear()
+        self.cells = 0
+
+    def stats(self):
+        lookups = self.hits + self.suffix_hits + self.misses
+        return {
+            'hits': self.hits,
+            'suffix_hits': self.suffix_hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits + self.suffix_hits) / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'cells': self.cells,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -0,0 +1,101 @@
+import heapq
+from itertools import count
+from time import perf_counter
+from settings import *
+from astar import AStar
+
+class PathScheduler:
+    """Cola de pedidos de camino con presupuesto por frame.
+
+    Cada frame `update` avanza las búsquedas A* pendientes hasta agotar
+    PATH_BUDGET_MS milisegundos o PATH_BUDGET_NODES expansiones; una búsqueda que no
+    termina se reanuda en el frame siguiente. Los pedidos se atienden por prioridad
+    (distancia al jugador) y varios pedidos del mismo agente se fusionan en uno.
+    El resultado se entrega con `agent.receive_path(path)`.
+    """
+    def __init__(self, grid, cache=None, budget_ms=PATH_BUDGET_MS, budget_nodes=PATH_BUDGET_NODES, slice_nodes=64):
+        self.grid = grid
+        self.engine = AStar(grid)  # Motor propio: su búsqueda activa sobrevive entre frames
+        self.cache = cache
+        self.budget_ms = budget_ms
+        self.budget_nodes = budget_nodes
+        self.slice_nodes = slice_nodes
+        self.queue = []      # (prioridad, orden, agente)
+        self.pending = {}    # agente -> (orden, start, goal)
+        self.order = count()
+        self.active = None   # (agente, start, goal) de la búsqueda en curso
+
+        self.completed = 0
+        self.coalesced = 0
+
+    def request(self, agent, start, goal, priority=0.0):
+        """Pide un camino; un pedido nuevo del mismo agente reemplaza al anterior"""
+        start, goal = tuple(start), tuple(goal)
+        if self.cache:
+            self.cache.validate()
+            path = self.cache.lookup(start, goal)
+            if path is not None:
+                self.cancel(agent)
+                agent.receive_path(path)
+                return
+
+        if agent in self.pending:
+            self.coalesced += 1
+        order = next(self.order)
+        self.pending[agent] = (order, start, goal)
+        heapq.heappush(self.queue, (priority, order, agent))
+
+    def cancel(self, agent):
+        self.pending.pop(agent, None)  # La entrada de la cola queda obsoleta
+        if self.active is not None and self.active[0] is agent:
+            self.active = None
+
+    def is_pending(self, agent):
+        return agent in self.pending or (self.active is not None and self.active[0] is agent)
+
+    def next_request(self):
+        while self.queue:
+            _, order, agent = heapq.heappop(self.queue)
+            request = self.pending.get(agent)
+            if request and request[0] == order:
+                del self.pending[agent]
+                return agent, request[1], request[2]
+        return None
+
+    def update(self):
+        """Avanza las búsquedas dentro del presupuesto del frame"""
+        deadline = perf_counter() + self.budget_ms / 1000
+        nodes_left = self.budget_nodes
+        while nodes_left > 0 and perf_counter() < deadline:
+            if self.active is None:
+                self.active = self.next_request()
+                if self.active is None:
+                    return
+                self.engine.start_search(self.active[1], self.active[2])
+
+            expanded = self.engine.expanded
+            path = self.engine.step(min(self.slice_nodes, nodes_left))
+            nodes_left -= max(1, self.engine.expanded - expanded)
+            if path is None:
+                continue  # Sigue en el próximo slice o frame
+
+            agent, start, goal = self.active
+            self.active = None
+            self.completed += 1
+            if self.cache:
+                self.cache.store((start, goal), path)
+            if agent.alive():
+                agent.receive_path(path)
+
+    def close(self):
+        self.queue.clear()
+        self.pending.clear()
+        self.active = None
+
+    def stats(self):
+        return {
+            'queued': len(self.pending),
+            'completed': self.completed,
+            'coalesced': self.coalesced,
+            'active': self.active is not None,
+        }
@@ -0,0 +1,168 @@
+import atexit
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from os import cpu_count
+from settings import *
+from navgrid import NavGrid
+from astar import AStar
+
+# Estado de cada proceso trabajador (se crea una vez en el initializer)
+_worker_memory = None
+_worker_engine = None
+
+def _init_worker(memory_name, cols, rows, tile_size):
+    global _worker_memory, _worker_engine
+    _worker_memory = SharedMemory(name=memory_name)
+    grid = NavGrid(cols, rows, tile_size, cells=_worker_memory.buf)
+    _worker_engine = AStar(grid)
+
+def _find_path(start, goal):
+    """Corre en el trabajador: devuelve el camino como índices de celda empaquetados"""
+    path = _worker_engine.find_path(start, goal)
+    cols = _worker_engine.grid.cols
+    return array('i', [y * cols + x for x, y in path]).tobytes()
+
+
+class PathWorkerPool:
+    """Pedidos de camino resueltos en un pool de procesos.
+
+    La grilla se comparte una sola vez por memoria compartida (los cambios de celda se
+    copian allí); solo viajan pares (start, goal) y los caminos vuelven empaquetados.
+    Tiene el mismo protocolo que PathScheduler: `request`, `is_pending` y `update`, que
+    entrega los resultados listos con `agent.receive_path(path)` en un frame posterior.
+    Si un pedido falla en el trabajador se resuelve con un A* local; si el pool se rompe
+    (un proceso murió) todos los pedidos siguientes se resuelven así, sin el pool.
+    """
+    def __init__(self, grid, workers=PATH_WORKERS, cache=None):
+        self.grid = grid
+        self.cache = cache
+        self.memory = SharedMemory(create=True, size=max(1, len(grid.cells)))
+        self.memory.buf[:len(grid.cells)] = grid.cells
+        grid.add_listener(self.on_cell_changed)
+
+        workers = workers if workers and workers > 0 else max(1, (cpu_count() or 2) - 1)
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(self.memory.name, grid.cols, grid.rows, grid.tile_size),
+        )
+        self.in_flight = {}  # agente -> (future, start, goal)
+        self.waiting = {}    # agente -> (start, goal) pedido más nuevo mientras hay uno en vuelo
+        self.completed = 0
+        self.coalesced = 0
+        self.failed = 0
+        self.broken = False
+        self.fallback = None  # AStar local, creado con el primer fallo
+        self.closed = False
+        atexit.register(self.close)
+
+    def on_cell_changed(self, x, y):
+        index = y * self.grid.cols + x
+        self.memory.buf[index] = self.grid.cells[index]
+
+    def request(self, agent, start, goal, priority=0.0):
+        """Envía un pedido; como mucho hay uno en vuelo por agente y el resto se fusiona"""
+        start, goal = tuple(start), tuple(goal)
+        if self.cache:
+            self.cache.validate()
+            path = self.cache.lookup(start, goal)
+            if path is not None:
+                # El resultado en vuelo es más viejo que este: no debe pisarlo al llegar
+                self.cancel(agent)
+                agent.receive_path(path)
+                return
+
+        if self.broken:
+            self.resolve_locally(agent, start, goal)
+            return
+        if agent in self.in_flight:
+            if agent in self.waiting:
+                self.coalesced += 1
+            self.waiting[agent] = (start, goal)
+            return
+        try:
+            future = self.executor.submit(_find_path, start, goal)
+        except BrokenProcessPool as error:
+            self.on_broken(error)
+            self.resolve_locally(agent, start, goal)
+            return
+        self.in_flight[agent] = (future, start, goal)
+
+    def on_broken(self, error):
+        if not self.broken:
+            print(f"ADVERTENCIA: el pool de caminos dejó de funcionar ({error!r}); se sigue con A* local")
+        self.broken = True
+
+    def resolve_locally(self, agent, start, goal):
+        """Camino calculado en este proceso, entregado en el acto"""
+        if self.fallback is None:
+            self.fallback = AStar(self.grid)
+        self.waiting.pop(agent, None)
+        path = self.fallback.find_path(start, goal)
+        if self.cache:
+            self.cache.store((start, goal), path)
+        if agent.alive():
+            agent.receive_path(path)
+
+    def cancel(self, agent):
+        """Descarta los pedidos del agente; un resultado en vuelo se ignora al llegar"""
+        self.waiting.pop(agent, None)
+        request = self.in_flight.pop(agent, None)
+        if request:
+            request[0].cancel()
+
+    def is_pending(self, agent):
+        return agent in self.in_flight or agent in self.waiting
+
+    def update(self):
+        """Entrega los resultados terminados sin bloquear el bucle del juego"""
+        cols = self.grid.cols
+        for agent, (future, start, goal) in list(self.in_flight.items()):
+            if not future.done():
+                continue
+            del self.in_flight[agent]
+            try:
+                result = future.result()
+            except Exception as error:
+                # Un trabajador caído o una excepción en _find_path no deben cortar el juego
+                self.failed += 1
+                if isinstance(error, BrokenProcessPool):
+                    self.on_broken(error)
+                # Si mientras tanto llegó un pedido más nuevo, se resuelve ese
+                self.resolve_locally(agent, *self.waiting.get(agent, (start, goal)))
+                continue
+            self.completed += 1
+            indices = array('i')
+            indices.frombytes(result)
+            path = [(index % cols, index // cols) for index in indices]
+            if self.cache:
+                self.cache.store((start, goal), path)
+            if agent.alive():
+                agent.receive_path(path)
+                if agent in self.waiting:
+                    self.request(agent, *self.waiting.pop(agent))
+            else:
+                self.waiting.pop(agent, None)
+
+    def stats(self):
+        return {
+            'in_flight': len(self.in_flight),
+            'waiting': len(self.waiting),
+            'completed': self.completed,
+            'coalesced': self.coalesced,
+            'failed': self.failed,
+            'broken': self.broken,
+        }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.grid.remove_listener(self.on_cell_changed)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.memory.close()
+        self.memory.unlink()
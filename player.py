@@ -1,42 +1,46 @@
 from settings import * 
+from simclock import sim_clock
+from hud import render_text
+from assets import assets
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, pos, groups, collision_sprites):
         super().__init__(groups)
         self.load_images()
+
+        # Movement
+        self.speed = 500
+        self.collision_sprites = collision_sprites
+
+        # Health system
+        self.max_health = 100
+        self.invulnerable_duration = 500  # Milisegundos de invulnerabilidad después de recibir daño
+        self.reset(pos)
+
+    def reset(self, pos):
+        """Estado de una partida nueva (también al reiniciar la sesión)"""
         self.state, self.frame_index = 'right', 0
-        self.image = pygame.image.load(join('images', 'player', 'down', '0.png')).convert_alpha()
+        self.image = self.frames['down'][0]
+        self.mask = self.masks['down'][0]
         self.rect = self.image.get_rect(center=pos)
         self.hitbox_rect = self.rect.inflate(-60, -90)
+        self.previous_topleft = None  # Sin interpolar desde la posición de la partida anterior
 
         # Vector de posición para rastreo preciso
         self.pos = pygame.Vector2(pos)
-
-        # Movement
         self.direction = pygame.Vector2()
-        self.speed = 500
-        self.collision_sprites = collision_sprites
 
-        # Health system
-        self.max_health = 100
         self.health = self.max_health  # Vida inicial del jugador
         self.is_alive = True  # Indica si el jugador está vivo
         self.hit_time = 0  # Tiempo del último daño recibido
-        self.invulnerable_duration = 500  # Milisegundos de invulnerabilidad después de recibir daño
         self.is_invulnerable = False  # Estado de invulnerabilidad
         self.damage_display_time = 0  # Para mostrar el daño recibido
         self.last_damage_amount = 0  # Última cantidad de daño recibido
         
     def load_images(self):
-        self.frames = {'left': [], 'right': [], 'up': [], 'down': []}
-
-        for state in self.frames.keys():
-            for folder_path, sub_folders, file_names in walk(join('images', 'player', state)):
-                if file_names:
-                    for file_name in sorted(file_names, key=lambda name: int(name.split('.')[0])):
-                        full_path = join(folder_path, file_name)
-                        surf = pygame.image.load(full_path).convert_alpha()
-                        self.frames[state].append(surf)
+        # Frames y máscaras compartidos: se cargan y calculan una sola vez
+        self.frames = {state: assets.folder_frames('images', 'player', state, group='player') for state in ('left', 'right', 'up', 'down')}
+        self.masks = {state: assets.frame_masks(('player', state), frames) for state, frames in self.frames.items()}
 
     def input(self):
         # Reiniciar dirección
@@ -83,7 +87,7 @@ class Player(pygame.sprite.Sprite):
         self.rect.center = self.hitbox_rect.center
 
     def collision(self, direction):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_sprites.nearby(self.hitbox_rect):
             if sprite.rect.colliderect(self.hitbox_rect):
                 if direction == 'horizontal':
                     if self.direction.x > 0:
@@ -107,11 +111,13 @@ class Player(pygame.sprite.Sprite):
         self.frame_index = self.frame_index + 5 * dt if self.direction.length() > 0 else 0
         
         # Obtener frame base
-        base_image = self.frames[self.state][int(self.frame_index) % len(self.frames[self.state])]
+        index = int(self.frame_index) % len(self.frames[self.state])
+        base_image = self.frames[self.state][index]
+        self.mask = self.masks[self.state][index]  # El parpadeo no cambia la silueta
         
         # Si estamos invulnerables, parpadear
         if self.is_invulnerable:
-            current_time = pygame.time.get_ticks()
+            current_time = sim_clock.get_ticks()
             if (current_time // 100) % 2:  # Parpadeo cada 100ms
                 # Crear una versión más clara de la imagen
                 alpha_img = base_image.copy()
@@ -124,7 +130,7 @@ class Player(pygame.sprite.Sprite):
 
     def check_invulnerability(self):
         """Verifica y actualiza el estado de invulnerabilidad"""
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         
         if self.is_invulnerable:
             if current_time - self.hit_time >= self.invulnerable_duration:
@@ -132,7 +138,7 @@ class Player(pygame.sprite.Sprite):
 
     def take_damage(self, amount):
         """Método para que el jugador reciba daño"""
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         
         # Solo recibir daño si no estamos invulnerables
         if self.is_alive and not self.is_invulnerable:
@@ -150,10 +156,16 @@ class Player(pygame.sprite.Sprite):
                 self.is_alive = False
                 print("Game Over - Jugador ha muerto")
     
-    def draw_health_bar(self, surface):
-        """Dibuja una barra de salud sobre el jugador"""
+    def is_showing_damage(self):
+        """El número del último daño se muestra durante 1 segundo"""
+        return sim_clock.get_ticks() - self.damage_display_time < 1000
+
+    def draw_health_bar(self, surface, center=None):
+        """Dibuja una barra de salud sobre el jugador (`center`: su centro en `surface`)"""
         if self.health < self.max_health:
-            x, y = self.rect.centerx, self.rect.top - 10
+            if center is None:
+                center = self.rect.center
+            x, y = int(center[0]), int(center[1] - self.rect.height / 2 - 10)
             width, height = 50, 5
             
             # Fondo de la barra (rojo)
@@ -167,10 +179,8 @@ class Player(pygame.sprite.Sprite):
             pygame.draw.rect(surface, (0, 0, 0), (x - width//2, y, width, height), 1)
             
             # Mostrar el daño recibido
-            current_time = pygame.time.get_ticks()
-            if current_time - self.damage_display_time < 1000:  # Mostrar por 1 segundo
-                font = pygame.font.Font(None, 24)
-                damage_text = font.render(f"-{self.last_damage_amount}", True, (255, 0, 0))
+            if self.is_showing_damage():
+                damage_text = render_text(24, f"-{self.last_damage_amount}", (255, 0, 0))
                 surface.blit(damage_text, (x + 30, y - 20))
     
     def update(self, dt):
@@ -0,0 +1,58 @@
+from settings import *
+
+class PooledSprite(pygame.sprite.Sprite):
+    """Sprite reciclable: al morir vuelve a su pool en lugar de descartarse.
+
+    Las subclases reciben los mismos argumentos en `__init__` y en `reset`; `reset`
+    reinicia el estado de una vida nueva y vuelve a agregar el sprite a sus grupos.
+    """
+    pool = None
+
+    def kill(self):
+        was_alive = self.alive()
+        super().kill()
+        if was_alive and self.pool:
+            self.pool.release(self)
+
+class SpritePool:
+    """Lista libre de capacidad fija para un tipo de PooledSprite"""
+    def __init__(self, sprite_class, capacity):
+        self.sprite_class = sprite_class
+        self.capacity = capacity
+        self.free = []
+        self.active = 0
+        self.high_water = 0
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def acquire(self, *args, **kwargs):
+        """Reutiliza un sprite libre (reset) o crea uno nuevo si la lista está vacía"""
+        if self.free:
+            sprite = self.free.pop()
+            sprite.reset(*args, **kwargs)
+            self.reused += 1
+        else:
+            sprite = self.sprite_class(*args, **kwargs)
+            sprite.pool = self
+            self.created += 1
+        self.active += 1
+        self.high_water = max(self.high_water, self.active)
+        return sprite
+
+    def release(self, sprite):
+        self.active -= 1
+        if len(self.free) < self.capacity:
+            self.free.append(sprite)
+        else:
+            self.discarded += 1
+
+    def stats(self):
+        return {
+            'active': self.active,
+            'free': len(self.free),
+            'high_water': self.high_water,
+            'created': self.created,
+            'reused': self.reused,
+            'discarded': self.discarded,
+        }
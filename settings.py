@@ -4,8 +4,72 @@ from os import walk
 
 WINDOW_WIDTH, WINDOW_HEIGHT = 1280,720 
 TILE_SIZE = 64
-GRID_ROWS = WINDOW_HEIGHT // TILE_SIZE
-GRID_COLS = WINDOW_WIDTH // TILE_SIZE
+GROUND_CHUNK_TILES = 16  # Tiles por lado de cada chunk pre-renderizado del suelo
+SPATIAL_CELL_SIZE = 128  # Tamaño de celda del hash espacial de colisiones (px)
+ENEMY_GRID_CELL_SIZE = 128  # Tamaño de celda de la grilla dinámica de enemigos (px)
+BULLET_POOL_SIZE = 64    # Balas libres que se guardan para reutilizar
+ENEMY_POOL_SIZE = 256    # Enemigos libres que se guardan para reutilizar
+
+# Evaluar el árbol de comportamiento de los enemigos aplanado, sin recursión
+BEHAVIOR_TREE_COMPILED = False
+
+# Nivel de detalle de la IA: los enemigos lejanos piensan cada N frames
+AI_LOD_ENABLED = True
+AI_LOD_ATTACK_MARGIN = 40  # Margen sobre attack_range (px) en el que se piensa cada frame
+AI_LOD_TIERS = ((0.5, 2), (1.0, 4))  # (fracción de detection_range, intervalo en frames)
+AI_LOD_FAR_INTERVAL = 8  # Más allá de detection_range
+
+# Steering de enemigos: separación, alineación y evasión de obstáculos sobre la persecución
+STEERING_ENABLED = True
+STEERING_RADIUS = 48  # Radio de vecindad (px)
+STEERING_SEPARATION_WEIGHT = 1.2
+STEERING_ALIGNMENT_WEIGHT = 0.3
+STEERING_LOOKAHEAD = 40  # Distancia (px) a la que se mira adelante buscando obstáculos
+STEERING_AVOID_ANGLES = (35, -35, 70, -70, 110, -110)
+
+# Simulación de enemigos: 'sprites' (un Enemy.update por enemigo) o 'numpy' (por lotes)
+ENEMY_BACKEND = 'sprites'
+HORDE_SYNC_MARGIN = 200  # Margen alrededor de la cámara (px) en el que se copian imagen y máscara
+
+# Navegación de enemigos: 'direct' (línea recta), 'astar' (A* por enemigo),
+# 'hpa' (A* jerárquico por enemigo) o 'flowfield' (campo compartido)
+ENEMY_PATHING_MODE = 'flowfield'
+HPA_CLUSTER_SIZE = 10     # Celdas por lado de cada cluster del pathfinding jerárquico
+HPA_REFINE_SEGMENTS = 2   # Tramos abstractos que se refinan a celdas en cada consulta
+PATH_CACHE_ENABLED = True     # Caché LRU de caminos para los modos 'astar' y 'hpa'
+PATH_CACHE_MAX_CELLS = 20000  # Presupuesto de memoria de la caché (celdas guardadas en total)
+PATH_SCHEDULER_ENABLED = True  # Repartir las búsquedas del modo 'astar' entre frames
+PATH_BUDGET_MS = 2.0           # Tiempo máximo de búsqueda por frame
+PATH_BUDGET_NODES = 4000       # Expansiones máximas por frame
+PATH_WORKERS = 0               # Procesos para el modo 'astar' (0 = desactivado, -1 = núcleos - 1)
+
+# Colisión continua de balas: ray-cast del tramo de cada frame (False = máscaras en la posición final)
+BULLET_SWEPT_COLLISION = True
+
+# Caché de rotación del arma: resolución angular en grados (0 = rotozoom en cada frame).
+# Guarda 2 * 360 / GUN_ROTATION_STEP superficies: a menor paso, más memoria
+GUN_ROTATION_STEP = 2
+
+# Bucle de simulación: pasos fijos de 1/SIM_RATE s, dibujado a lo sumo a RENDER_FPS
+SIM_RATE = 60
+RENDER_FPS = 120  # Tope del dibujado; 0 = sin límite (consume un núcleo entero)
+MAX_FRAME_TIME = 0.25  # Tope de tiempo real por vuelta (s), evita la espiral de recuperación
+ENEMY_SPAWN_INTERVAL = 300  # ms simulados entre spawns de enemigos
+
+# Atlas de texturas: páginas de ATLAS_SIZE px para imágenes de hasta ATLAS_MAX_IMAGE px por lado
+ATLAS_SIZE = 512
+ATLAS_MAX_IMAGE = 256
+ATLAS_PADDING = 0  # Sin filtrado de texturas no hay sangrado entre vecinos
+
+# Mapa precompilado: artefacto binario junto al .tmx (se recompila si el .tmx cambia)
+MAP_CACHE_ENABLED = True  # False: compilar en memoria en cada arranque, sin escribir el archivo
+MAP_CACHE_SUFFIX = '.mapcache'
+
+# Interfaz: superficies de texto renderizadas que se guardan (LRU)
+HUD_TEXT_CACHE_SIZE = 128
+HUD_COUNTERS_AREA = (20, 20, 400, 64)  # Zona de los textos de salud y enemigos (x, y, ancho, alto)
+HUD_JOYSTICK_HELP_AREA = (WINDOW_WIDTH - 250, 20, 250, 92)
+HUD_HEALTH_BAR_SIZE = (110, 25)  # Barra de salud y daño recibido, sobre el jugador
 
 # Joystick settings
 JOYSTICK_DEADZONE = 0.2  # Zona muerta para evitar movimientos no deseados
@@ -0,0 +1,22 @@
+class SimClock:
+    """Reloj de la simulación: avanza solo con los pasos fijos del bucle, no con el tiempo real.
+
+    La lógica del juego (cooldowns, animaciones, vida de las balas) lo consulta en lugar
+    de pygame.time.get_ticks(), así una misma semilla y cantidad de pasos da siempre el
+    mismo resultado, con ventana o sin ella.
+    """
+    def __init__(self):
+        self.ticks = 0.0
+
+    def get_ticks(self):
+        """Milisegundos simulados desde el último reset"""
+        return int(self.ticks)
+
+    def advance(self, dt):
+        self.ticks += dt * 1000
+
+    def reset(self):
+        self.ticks = 0.0
+
+# Un solo reloj compartido por todo el juego
+sim_clock = SimClock()
@@ -0,0 +1,52 @@
+from settings import *
+
+class SpatialHash:
+    """Hash espacial uniforme: cada objeto se registra en todas las celdas que toca su rect.
+
+    Una consulta solo revisa las celdas que solapa el rect consultado, así el costo
+    depende de los objetos cercanos y no del total del mapa.
+    """
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+
+    def cell_range(self, rect):
+        size = self.cell_size
+        return (int(rect.left // size), int(rect.top // size),
+                int((rect.right - 1) // size), int((rect.bottom - 1) // size))
+
+    def insert(self, item, rect):
+        first_x, first_y, last_x, last_y = self.cell_range(rect)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                self.cells.setdefault((cell_x, cell_y), []).append(item)
+
+    def query(self, rect):
+        """Objetos registrados en las celdas que solapa `rect` (sin repetidos)"""
+        first_x, first_y, last_x, last_y = self.cell_range(rect)
+        cells = self.cells
+        if first_x == last_x and first_y == last_y:
+            return cells.get((first_x, first_y), ())
+
+        found = {}
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(dict.fromkeys(bucket))
+        return found.keys()
+
+    def clear(self):
+        self.cells.clear()
+
+class DynamicGrid(SpatialHash):
+    """Hash espacial para objetos móviles, reconstruido cada frame en O(n).
+
+    Las listas de cada celda se vacían en lugar de descartarse para no asignar
+    memoria nueva en cada reconstrucción.
+    """
+    def rebuild(self, sprites):
+        for bucket in self.cells.values():
+            bucket.clear()
+        for sprite in sprites:
+            self.insert(sprite, sprite.rect)
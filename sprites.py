@@ -1,10 +1,16 @@
 from settings import * 
+from simclock import sim_clock
 from math import atan2, degrees
 from astar import astar_pathfinding
-from behavior_tree import Node,Selector,Sequence,Action
+from hpa import hpa_pathfinding
+from behavior_tree import Selector, Sequence, Action, Condition, Blackboard, compile_tree
+from pool import PooledSprite
+from assets import assets
 from random import randint, choice
 
 class Sprite(pygame.sprite.Sprite):
+    static = True  # No se mueve: AllSprites lo ordena una sola vez
+
     def __init__(self, pos, surf, groups):
         super().__init__(groups)
         self.image = surf
@@ -12,24 +18,52 @@ class Sprite(pygame.sprite.Sprite):
         self.ground = True
 
 class CollisionSprite(pygame.sprite.Sprite):
+    static = True
+
     def __init__(self, pos, surf, groups):
         super().__init__(groups)
         self.image = surf
         self.rect = self.image.get_rect(topleft = pos)
 
+class RotationCache:
+    """Superficies del arma pre-rotadas en pasos de `step` grados (normal y volteada)"""
+    def __init__(self, surf, step=GUN_ROTATION_STEP):
+        self.step = step
+        self.count = max(1, round(360 / step))
+        self.normal = []
+        self.flipped = []
+        for index in range(self.count):
+            rotated = pygame.transform.rotozoom(surf, index * step, 1)
+            self.normal.append(rotated)
+            self.flipped.append(pygame.transform.flip(rotated, False, True))
+
+    def get(self, angle, flipped=False):
+        """Superficie para el ángulo más cercano, en O(1)"""
+        index = round(angle / self.step) % self.count
+        return self.flipped[index] if flipped else self.normal[index]
+
 class Gun(pygame.sprite.Sprite):
+    rotation_cache = None  # Compartida entre instancias (y reinicios)
+
     def __init__(self, player, groups):
         # player connection 
         self.player = player 
         self.distance = 140
-        self.player_direction = pygame.Vector2(0, 1)  # Dirección inicial hacia abajo
-        self.aim_position = pygame.Vector2(0, 1)  # Posición relativa para apuntar
 
         # sprite setup 
         super().__init__(groups)
-        self.gun_surf = pygame.image.load(join('images', 'gun', 'gun.png')).convert_alpha()
+        self.gun_surf = assets.image('images', 'gun', 'gun.png', group='gun')
+        if GUN_ROTATION_STEP and (Gun.rotation_cache is None or Gun.rotation_cache.step != GUN_ROTATION_STEP):
+            Gun.rotation_cache = RotationCache(self.gun_surf)
+        self.reset()
+
+    def reset(self):
+        """Vuelve a apuntar hacia abajo, junto al jugador (también al reiniciar la sesión)"""
+        self.player_direction = pygame.Vector2(0, 1)  # Dirección inicial hacia abajo
+        self.aim_position = pygame.Vector2(0, 1)  # Posición relativa para apuntar
         self.image = self.gun_surf
         self.rect = self.image.get_rect(center = self.player.rect.center + self.player_direction * self.distance)
+        self.previous_topleft = None
     
     def get_direction(self):
         # Verificar joysticks disponibles
@@ -58,7 +92,13 @@ class Gun(pygame.sprite.Sprite):
 
     def rotate_gun(self):
         angle = degrees(atan2(self.player_direction.x, self.player_direction.y)) - 90
-        if self.player_direction.x > 0:
+        if GUN_ROTATION_STEP:
+            # Superficie pre-rotada más cercana en lugar de rotozoom en cada frame
+            if self.player_direction.x > 0:
+                self.image = Gun.rotation_cache.get(angle)
+            else:
+                self.image = Gun.rotation_cache.get(abs(angle), flipped=True)
+        elif self.player_direction.x > 0:
             self.image = pygame.transform.rotozoom(self.gun_surf, angle, 1)
         else:
             self.image = pygame.transform.rotozoom(self.gun_surf, abs(angle), 1)
@@ -69,60 +109,96 @@ class Gun(pygame.sprite.Sprite):
         self.rotate_gun()
         self.rect.center = self.player.rect.center + self.player_direction * self.distance
         
-class Bullet(pygame.sprite.Sprite):
-    def __init__(self, surf, pos, direction, groups):
-        super().__init__(groups)
-        self.image = surf 
-        self.rect = self.image.get_rect(center = pos)
-        self.spawn_time = pygame.time.get_ticks()
+class Bullet(PooledSprite):
+    def __init__(self, surf, pos, direction, groups, mask=None):
+        super().__init__()
+        self.direction = pygame.Vector2()
+        self.previous = pygame.Vector2()  # Centro al inicio del frame: el tramo recorrido va de aquí a rect.center
         self.lifetime = 1000
-
-        self.direction = direction 
         self.speed = 1200 
+        self.reset(surf, pos, direction, groups, mask)
+
+    def reset(self, surf, pos, direction, groups, mask=None):
+        """Estado de una vida nueva (también al salir del pool)"""
+        self.image = surf 
+        self.rect = self.image.get_rect(center = pos)
+        if mask:
+            self.mask = mask  # Máscara compartida: collide_mask no la recrea en cada prueba
+        self.spawn_time = sim_clock.get_ticks()
+        self.direction.update(direction)
+        self.previous.update(self.rect.center)
+        self.add(groups)
     
     def update(self, dt):
+        self.previous.update(self.rect.center)
         self.rect.center += self.direction * self.speed * dt
 
-        if pygame.time.get_ticks() - self.spawn_time >= self.lifetime:
+        if sim_clock.get_ticks() - self.spawn_time >= self.lifetime:
             self.kill()
 
 
-class Enemy(pygame.sprite.Sprite):
-    def __init__(self, pos, frames, groups, player, collision_sprites, grid):
-        super().__init__(groups)
+class Enemy(PooledSprite):
+    behavior_tree = None  # Árbol compartido por todos los enemigos (ver ENEMY_BEHAVIOR)
+    horde = None  # EnemyHorde que lo simula por lotes (backend 'numpy')
+    horde_slot = None
+    spawned = 0  # Contador de vidas: da a cada enemigo un número de serie estable
+
+    def __init__(self, pos, frames, groups, player, collision_sprites, grid, flow_field=None, pathing_mode=ENEMY_PATHING_MODE, pathfinder=None, path_requests=None, masks=None, death_surf=None, think_scheduler=None, steering=None):
+        super().__init__()
+        # Lo que no depende de la vida del enemigo se crea una sola vez y sobrevive al pool
+        self.direction = pygame.Vector2()
+        self.heading = pygame.Vector2()  # Rumbo real tras aplicar el steering
+        self.speed = 200
+        self.animation_speed = 6
+        self.attack_cooldown = 1000  # 1 segundo entre ataques
+        self.path_update_cooldown = 500  # Incrementado para reducir la frecuencia de cálculos
+        self.attack_damage = 10  # Daño que causa cada ataque
+        self.attack_range = 80   # Distancia para poder atacar
+        self.detection_range = 800  # Rango de detección
+        self.debug_mode = True  # Activar depuración para visualizar problemas
+        self.surface = pygame.display.get_surface()  # Para dibujar elementos de depuración
+
+        # Estado propio en el árbol de comportamiento compartido (ENEMY_BEHAVIOR)
+        self.blackboard = Blackboard()
+        self.reset(pos, frames, groups, player, collision_sprites, grid, flow_field, pathing_mode, pathfinder, path_requests, masks, death_surf, think_scheduler, steering)
+
+    def reset(self, pos, frames, groups, player, collision_sprites, grid, flow_field=None, pathing_mode=ENEMY_PATHING_MODE, pathfinder=None, path_requests=None, masks=None, death_surf=None, think_scheduler=None, steering=None):
+        """Estado de una vida nueva (también al salir del pool)"""
         self.player = player
         self.grid = grid
+        self.flow_field = flow_field  # Campo de flujo compartido (modo 'flowfield')
+        self.pathing_mode = pathing_mode
+        # Búsqueda por enemigo con la misma firma (start, goal, grid) en los modos 'astar' y 'hpa'
+        self.pathfinder = pathfinder or (hpa_pathfinding if pathing_mode == 'hpa' else astar_pathfinding)
+        self.path_requests = path_requests  # Planificador con presupuesto por frame (opcional)
+        if path_requests is not None:
+            path_requests.cancel(self)  # Un pedido de la vida anterior ya no sirve
         self.frames = frames
         self.frame_index = 0
-        self.animation_speed = 6
+        # Máscaras precalculadas por frame (Game.load_images); se cambian junto con la imagen
+        self.masks = masks or [pygame.mask.from_surface(frame) for frame in frames]
+        self.death_surf = death_surf
         self.image = self.frames[self.frame_index]
+        self.mask = self.masks[self.frame_index]
         self.rect = self.image.get_rect(center=pos)
         self.hitbox_rect = self.rect.inflate(-20, -40)
-        self.direction = pygame.Vector2()
-        self.speed = 200
+        self.direction.update(0, 0)
         self.path = []
         self.death_time = 0
         self.health = 100
-        self.attack_cooldown = 1000  # 1 segundo entre ataques
         self.last_attack_time = 0
         self.last_path_update = 0
-        self.path_update_cooldown = 500  # Incrementado para reducir la frecuencia de cálculos
         self.collision_sprites = collision_sprites
-        self.attack_damage = 10  # Daño que causa cada ataque
-        self.attack_range = 80   # Distancia para poder atacar
         self.is_attacking = False
         self.attack_animation_time = 0
-        self.detection_range = 800  # Rango de detección
-        self.debug_mode = True  # Activar depuración para visualizar problemas
-        self.surface = pygame.display.get_surface()  # Para dibujar elementos de depuración
-
-        # Árbol de comportamiento con opción de persecución simple
-        self.behavior_tree = Selector([
-            # Secuencia de ataque: alta prioridad
-            Sequence([Action(self.is_player_in_attack_range), Action(self.attack_player)]),
-            # Persecución: segunda prioridad (esto siempre se ejecutará si el jugador está vivo)
-            Action(self.simple_chase_player)  # ¡Cambiado a persecución simple!
-        ])
+        self.blackboard.clear()
+        self.think_scheduler = think_scheduler  # Nivel de detalle de la IA (opcional)
+        self.think_bucket = None
+        Enemy.spawned += 1
+        self.serial = Enemy.spawned
+        self.steering = steering  # Separación/alineación/evasión sobre la persecución (opcional)
+        self.heading.update(0, 0)
+        self.add(groups)
 
     def animate(self, dt):
         # Si está atacando, usar animación de ataque (podría ser más rápida)
@@ -132,10 +208,12 @@ class Enemy(pygame.sprite.Sprite):
             animation_speed = self.animation_speed
             
         self.frame_index += animation_speed * dt
-        self.image = self.frames[int(self.frame_index) % len(self.frames)]
+        index = int(self.frame_index) % len(self.frames)
+        self.image = self.frames[index]
+        self.mask = self.masks[index]
         
         # Si la animación de ataque ha terminado
-        if self.is_attacking and pygame.time.get_ticks() - self.attack_animation_time > 300:
+        if self.is_attacking and sim_clock.get_ticks() - self.attack_animation_time > 300:
             self.is_attacking = False
 
     def is_player_in_attack_range(self):
@@ -148,7 +226,7 @@ class Enemy(pygame.sprite.Sprite):
 
     def attack_player(self):
         """Ataca al jugador si está en rango y el cooldown ha terminado"""
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         
         # Verificar si podemos atacar nuevamente
         if current_time - self.last_attack_time >= self.attack_cooldown:
@@ -161,7 +239,7 @@ class Enemy(pygame.sprite.Sprite):
                 self.player.take_damage(self.attack_damage)
                 
                 # Detener brevemente al enemigo durante el ataque
-                self.direction = pygame.Vector2(0, 0)
+                self.direction.update(0, 0)
                 
                 # Orientar al enemigo hacia el jugador
                 player_direction = pygame.Vector2(self.player.rect.center) - pygame.Vector2(self.rect.center)
@@ -174,11 +252,35 @@ class Enemy(pygame.sprite.Sprite):
         # que estamos "atacando" para el árbol de comportamiento
         return True
 
+    def chase(self):
+        """Persigue al jugador según el modo de navegación configurado"""
+        if self.pathing_mode == 'flowfield' and self.flow_field:
+            return self.flow_chase_player()
+        if self.pathing_mode in ('astar', 'hpa'):
+            return self.chase_player()
+        return self.simple_chase_player()
+
+    def flow_chase_player(self):
+        """Persecución leyendo el siguiente paso del campo de flujo compartido (O(1))"""
+        if not self.player.is_alive:
+            self.direction.update(0, 0)
+            return False
+
+        next_cell = self.flow_field.next_cell(self.grid.world_to_cell(*self.rect.center))
+        if next_cell is None or next_cell == self.flow_field.target:
+            # Misma celda que el jugador (o sin camino): ir directo
+            return self.simple_chase_player()
+
+        direction = pygame.Vector2(self.grid.cell_to_world(next_cell)) - pygame.Vector2(self.rect.center)
+        if direction.length() > 0:
+            self.direction.update(direction.normalize())
+        return True
+
     def simple_chase_player(self):
         """Método simplificado para perseguir al jugador directamente"""
         if not self.player.is_alive:
             # Si el jugador está muerto, detenerse
-            self.direction = pygame.Vector2(0, 0)
+            self.direction.update(0, 0)
             return False
         
         # Perseguir directamente sin usar A*
@@ -187,9 +289,9 @@ class Enemy(pygame.sprite.Sprite):
         direction = player_vec - enemy_vec
         
         if direction.length() > 0:
-            self.direction = direction.normalize()
+            self.direction.update(direction.normalize())
         else:
-            self.direction = pygame.Vector2(0, 0)
+            self.direction.update(0, 0)
             
         # Siempre devolver True para que el árbol de comportamiento siga ejecutando esta acción
         return True
@@ -198,66 +300,45 @@ class Enemy(pygame.sprite.Sprite):
         """Método original de persecución que usa A* (mantendré para referencia)"""
         if not self.player.is_alive:
             # Si el jugador está muerto, detenerse
-            self.direction = pygame.Vector2(0, 0)
+            self.direction.update(0, 0)
             return False
         
-        current_time = pygame.time.get_ticks()
+        current_time = sim_clock.get_ticks()
         
         # Actualizar el camino periódicamente o si está vacío
-        if not self.path or current_time - self.last_path_update >= self.path_update_cooldown:
+        waiting = self.path_requests is not None and self.path_requests.is_pending(self)
+        if (not self.path and not waiting) or current_time - self.last_path_update >= self.path_update_cooldown:
             self.last_path_update = current_time
             
-            # Convertir posiciones a coordenadas de grilla
-            player_grid_pos = (
-                int(self.player.rect.centerx // TILE_SIZE),
-                int(self.player.rect.centery // TILE_SIZE)
-            )
-            enemy_grid_pos = (
-                int(self.rect.centerx // TILE_SIZE),
-                int(self.rect.centery // TILE_SIZE)
-            )
-            
-            # Asegurarnos de que las coordenadas estén dentro de los límites
-            player_grid_pos = (
-                max(0, min(GRID_COLS-1, player_grid_pos[0])),
-                max(0, min(GRID_ROWS-1, player_grid_pos[1]))
-            )
-            enemy_grid_pos = (
-                max(0, min(GRID_COLS-1, enemy_grid_pos[0])),
-                max(0, min(GRID_ROWS-1, enemy_grid_pos[1]))
-            )
-            
-            # Calcular nuevo camino
-            new_path = astar_pathfinding(enemy_grid_pos, player_grid_pos, self.grid)
+            # Convertir posiciones a coordenadas de grilla (dentro de los límites)
+            player_grid_pos = self.grid.clamp_cell(self.grid.world_to_cell(*self.player.rect.center))
+            enemy_grid_pos = self.grid.clamp_cell(self.grid.world_to_cell(*self.rect.center))
             
-            if new_path:
-                # Eliminar el primer nodo si es nuestra posición actual
-                if new_path and len(new_path) > 1:
-                    self.path = new_path[1:]  # Saltamos el nodo actual
-                else:
-                    self.path = new_path
+            if self.path_requests is not None:
+                # Pedido repartido entre frames: mientras tanto se sigue el camino viejo
+                # o la persecución directa de abajo
+                distance = pygame.Vector2(self.rect.center).distance_squared_to(self.player.rect.center)
+                self.path_requests.request(self, enemy_grid_pos, player_grid_pos, distance)
             else:
-                # Si no hay camino, intentar moverse directamente hacia el jugador
-                self.path = []
+                # Calcular nuevo camino
+                self.receive_path(self.pathfinder(enemy_grid_pos, player_grid_pos, self.grid))
         
         # Si hay un camino, moverse hacia el siguiente punto
         if self.path:
             next_pos = self.path[0]
-            target_world_pos = (next_pos[0] * TILE_SIZE + TILE_SIZE // 2, 
-                               next_pos[1] * TILE_SIZE + TILE_SIZE // 2)
+            target_world_pos = self.grid.cell_to_world(next_pos)
             
             # Si estamos cerca del objetivo, avanzar al siguiente punto
             if pygame.Vector2(self.rect.center).distance_to(pygame.Vector2(target_world_pos)) < 10:
                 self.path.pop(0)
                 if self.path:
                     next_pos = self.path[0]
-                    target_world_pos = (next_pos[0] * TILE_SIZE + TILE_SIZE // 2, 
-                                     next_pos[1] * TILE_SIZE + TILE_SIZE // 2)
+                    target_world_pos = self.grid.cell_to_world(next_pos)
             
             # Calcular dirección hacia el objetivo
             direction = pygame.Vector2(target_world_pos) - pygame.Vector2(self.rect.center)
             if direction.length() > 0:
-                self.direction = direction.normalize()
+                self.direction.update(direction.normalize())
             
             return True
             
@@ -265,17 +346,31 @@ class Enemy(pygame.sprite.Sprite):
             # Si no hay camino, moverse directamente hacia el jugador
             direction = pygame.Vector2(self.player.rect.center) - pygame.Vector2(self.rect.center)
             if direction.length() > 0:
-                self.direction = direction.normalize()
+                self.direction.update(direction.normalize())
             return True
 
+    def receive_path(self, new_path):
+        """Adopta un camino de celdas (síncrono o entregado por el planificador)"""
+        if new_path:
+            # Eliminar el primer nodo si es nuestra posición actual
+            if len(new_path) > 1:
+                self.path = new_path[1:]  # Saltamos el nodo actual
+            else:
+                self.path = new_path
+        else:
+            # Si no hay camino, intentar moverse directamente hacia el jugador
+            self.path = []
+
     def move(self, dt):
         # No moverse durante la animación de ataque
         if self.is_attacking:
             return
             
-        # Mover según la dirección actual
-        if self.direction.length() > 0:
-            movement = self.direction * self.speed * dt
+        # Mover según la dirección actual, corregida por el steering si lo hay (se copia
+        # en el vector propio para no compartirlo con direction)
+        self.heading.update(self.steering.steer(self, self.direction) if self.steering else self.direction)
+        if self.heading.length() > 0:
+            movement = self.heading * self.speed * dt
             
             # Mover en X
             self.rect.x += movement.x
@@ -289,27 +384,36 @@ class Enemy(pygame.sprite.Sprite):
             self.hitbox_rect.center = self.rect.center
 
     def check_collision(self, direction):
-        for sprite in self.collision_sprites:
+        for sprite in self.collision_sprites.nearby(self.rect):
             if sprite.rect.colliderect(self.rect):
                 if direction == 'horizontal':
-                    if self.direction.x > 0:  # Moviendo a la derecha
+                    if self.heading.x > 0:  # Moviendo a la derecha
                         self.rect.right = sprite.rect.left
-                    elif self.direction.x < 0:  # Moviendo a la izquierda
+                    elif self.heading.x < 0:  # Moviendo a la izquierda
                         self.rect.left = sprite.rect.right
                 else:  # Vertical
-                    if self.direction.y > 0:  # Moviendo abajo
+                    if self.heading.y > 0:  # Moviendo abajo
                         self.rect.bottom = sprite.rect.top
-                    elif self.direction.y < 0:  # Moviendo arriba
+                    elif self.heading.y < 0:  # Moviendo arriba
                         self.rect.top = sprite.rect.bottom
 
     def destroy(self):
-        self.death_time = pygame.time.get_ticks()
-        surf = pygame.mask.from_surface(self.frames[0]).to_surface()
-        surf.set_colorkey('black')
-        self.image = surf
+        self.death_time = sim_clock.get_ticks()
+        if self.horde:
+            self.horde.deactivate(self)
+        if self.death_surf is None:
+            self.death_surf = self.masks[0].to_surface()
+            self.death_surf.set_colorkey('black')
+        self.image = self.death_surf
+        self.mask = self.masks[0]
+
+    def kill(self):
+        if self.horde:
+            self.horde.remove(self)
+        super().kill()
 
     def death_timer(self):
-        if pygame.time.get_ticks() - self.death_time >= 400:
+        if sim_clock.get_ticks() - self.death_time >= 400:
             self.kill()
 
     def debug_draw(self):
@@ -338,11 +442,25 @@ class Enemy(pygame.sprite.Sprite):
         )
 
     def update(self, dt):
+        if self.horde and self.death_time == 0:
+            return  # La horda ya lo simula por lotes
         if self.death_time == 0:
-            # Ejecutar el árbol de comportamiento
-            self.behavior_tree.run()
+            # Un tick del árbol de comportamiento compartido (si le toca pensar este frame);
+            # si no, se sigue moviendo con la última decisión
+            if self.think_scheduler is None or self.think_scheduler.should_think(self):
+                self.behavior_tree.tick(self, self.blackboard)
             self.move(dt)  # Usar dt para movimiento suave
             self.animate(dt)
             self.debug_draw()  # Dibujar información de depuración
         else:
-            self.death_timer()
\ No newline at end of file
+            self.death_timer()
+
+
+# Un único árbol inmutable para toda la horda; cada enemigo solo aporta su Blackboard
+ENEMY_BEHAVIOR = Selector([
+    # Secuencia de ataque: alta prioridad
+    Sequence([Condition(Enemy.is_player_in_attack_range), Action(Enemy.attack_player)]),
+    # Persecución: segunda prioridad (esto siempre se ejecutará si el jugador está vivo)
+    Action(Enemy.chase)
+])
+Enemy.behavior_tree = compile_tree(ENEMY_BEHAVIOR) if BEHAVIOR_TREE_COMPILED else ENEMY_BEHAVIOR
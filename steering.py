@@ -0,0 +1,74 @@
+from settings import *
+
+class Steering:
+    """Comportamientos de dirección sobre el vector de persecución.
+
+    Suma separación (alejarse de los vecinos demasiado cercanos), alineación (seguir el
+    rumbo medio de los vecinos) y evasión de obstáculos (mirar adelante en la NavGrid y
+    girar hacia el primer rumbo libre). Los vecinos salen de la grilla dinámica de
+    enemigos, reconstruida una vez por frame en O(n), así cada consulta es O(k); como
+    es la del paso anterior, se saltan los que murieron o volvieron al pool desde entonces.
+    """
+    def __init__(self, neighbors, grid, radius=STEERING_RADIUS):
+        self.neighbors = neighbors  # DynamicGrid de enemigos (Game.enemy_grid)
+        self.grid = grid
+        self.radius = radius
+        self.query_rect = pygame.Rect(0, 0, radius * 2, radius * 2)
+
+    def steer(self, agent, desired):
+        """Rumbo normalizado a partir de la dirección deseada `desired`, escrito en agent.heading"""
+        if desired.x == 0 and desired.y == 0:
+            return desired
+
+        x, y = agent.rect.center
+        self.query_rect.center = (x, y)
+        radius_squared = self.radius * self.radius
+        separation_x = separation_y = 0.0
+        alignment_x = alignment_y = 0.0
+        count = 0
+        for other in self.neighbors.query(self.query_rect):
+            if other is agent or other.death_time or not other.alive():
+                continue
+            dx = x - other.rect.centerx
+            dy = y - other.rect.centery
+            distance_squared = dx * dx + dy * dy
+            if distance_squared >= radius_squared:
+                continue
+            if distance_squared == 0:
+                # Exactamente encimados: desempatar con un empuje lateral fijo
+                dx, distance_squared = (1 if agent.serial > other.serial else -1), 1
+            # Empuje inversamente proporcional a la distancia (vale 1 en el borde del radio)
+            separation_x += dx * self.radius / distance_squared
+            separation_y += dy * self.radius / distance_squared
+            alignment_x += other.heading.x
+            alignment_y += other.heading.y
+            count += 1
+
+        heading = agent.heading  # Vector propio del agente: sin reservar uno por llamada
+        heading.update(desired)
+        if count:
+            heading.x += separation_x * STEERING_SEPARATION_WEIGHT + alignment_x / count * STEERING_ALIGNMENT_WEIGHT
+            heading.y += separation_y * STEERING_SEPARATION_WEIGHT + alignment_y / count * STEERING_ALIGNMENT_WEIGHT
+            if heading.x == 0 and heading.y == 0:
+                heading.update(desired)
+            heading.normalize_ip()
+
+        return self.avoid(x, y, heading)
+
+    def avoid(self, x, y, heading):
+        """Gira el rumbo hacia el primer ángulo libre si hay un obstáculo adelante"""
+        if not self.blocked(x, y, heading):
+            return heading
+        for angle in STEERING_AVOID_ANGLES:
+            candidate = heading.rotate(angle)
+            if not self.blocked(x, y, candidate):
+                return candidate
+        return heading
+
+    def blocked(self, x, y, heading):
+        grid = self.grid
+        cell = grid.world_to_cell(x + heading.x * STEERING_LOOKAHEAD, y + heading.y * STEERING_LOOKAHEAD)
+        # Desde dentro de un obstáculo (o de la misma celda) no se mira adelante
+        if cell == grid.world_to_cell(x, y):
+            return False
+        return not grid.is_walkable(*cell)